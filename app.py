@@ -1,35 +1,104 @@
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
+import math
+import time
+
 import pygame as pg
-from editor import Editor
-from text_rendering import load_fonts
+from editor import Editor, FrameTimings
+from text_rendering import load_fonts, set_builtin_functions
 from asset_manager import set_asset_path
 from language_manager import Language
+from runner import set_compile_cache_path, save_compile_cache, builtin_names
+
+# frames drawn per second at most while something changes on the screen
+DEFAULT_FPS = 60
+# posted by the runner when the running chart reports a new state to wake up the main loop
+RUNNER_STATE_EVENT = pg.event.custom_type()
 
 
 class App:
-    def __init__(self):
+    def __init__(self, chart_path: str | None = None, fps: int = DEFAULT_FPS):
         pg.init()
         self.screen = pg.display.set_mode((1280, 720), pg.RESIZABLE)
         pg.display.set_caption("FlowChart Runner")
         set_asset_path("_assets")
         load_fonts()
+        set_builtin_functions(builtin_names())
+        set_compile_cache_path(os.path.join(os.path.expanduser("~"), ".flowchart_runner", "compile_cache.pickle"))
         language = Language("italian.txt")
-        self.editor = Editor(language)
+        self.editor = Editor(language, self.__post_runner_state)
+        if chart_path is not None:
+            if os.path.exists(chart_path):
+                self.editor.load(chart_path)
+            else:
+                # the chart is created the first time it is saved
+                self.editor.chart_path = chart_path
+        self.fps = fps
+        self.clock = pg.time.Clock()
+        # shown with F3
+        self.frame_timings = FrameTimings()
         self.running = True
 
+    @staticmethod
+    def __post_runner_state():
+        try:
+            pg.event.post(pg.event.Event(RUNNER_STATE_EVENT))
+        except pg.error:
+            # the display was closed while the execution was ending
+            pass
+
+    def handle_event(self, event: pg.event.Event):
+        if event.type == pg.QUIT:
+            self.running = False
+        elif event.type == pg.KEYDOWN and event.key == pg.K_F3:
+            if self.frame_timings.visible:
+                self.frame_timings.hide()
+                self.editor.redraw()
+            else:
+                self.frame_timings.visible = True
+        else:
+            self.editor.handle_event(event)
+
     def handle_events(self):
         for event in pg.event.get():
-            if event.type == pg.QUIT:
-                self.running = False
+            self.handle_event(event)
+            if not self.running:
                 break
-            self.editor.handle_event(event)
+
+    def wait_events(self):
+        """Waits until an event is received or the editor must draw the next frame"""
+        timeout = self.editor.frame_timeout()
+        if timeout is None:
+            # nothing changes until the next event
+            self.handle_event(pg.event.wait())
+        elif timeout > 0:
+            # the timeout is rounded up to not wake up before the editor changes
+            event = pg.event.wait(math.ceil(timeout * 1000))
+            if event.type != pg.NOEVENT:
+                self.handle_event(event)
 
     def run(self):
         while self.running:
+            self.wait_events()
+            frame_start = time.perf_counter()
             self.handle_events()
-            self.editor.draw(self.screen)
-            pg.display.update()
+            events_end = time.perf_counter()
+            dirty_areas = self.editor.draw(self.screen)
+            if dirty_areas and self.frame_timings.visible:
+                dirty_areas.append(self.frame_timings.draw(self.screen))
+            draw_end = time.perf_counter()
+            if dirty_areas:
+                pg.display.update(dirty_areas)
+            flip_end = time.perf_counter()
+            self.frame_timings.record(
+                frame_start,
+                events_end - frame_start,
+                draw_end - events_end,
+                flip_end - draw_end
+            )
+            # while the editor keeps changing the frames are limited to the target rate
+            self.clock.tick(self.fps)
         self.editor.quit()
+        save_compile_cache()
         pg.quit()
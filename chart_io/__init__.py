@@ -0,0 +1,3 @@
+from .chart_io import load_chart, save_chart
+from .chart_io import read_chart, write_chart
+from .chart_io import ChartFileError
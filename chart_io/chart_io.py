@@ -0,0 +1,176 @@
+from typing import Iterable, TextIO
+
+from language_manager import Language
+from ui_components import BlockBase, StartBlock, EndBlock, IOBlock, CondBlock, InitBlock, CalcBlock
+from ui_components.arrow_point_selector import ArrowDirection
+
+# A chart file starts with the line "FCR <version>" followed by one line per block, the fields are separated by a
+# single space:
+#   <type> <x> <y> <in_point> <out_point> <next> <content>
+# conditional blocks have two branches instead of a single out_point and next:
+#   C <x> <y> <in_point> <true_out_point> <true_next> <false_out_point> <false_next> <content>
+# next is the index of the line of the next block (the first block is 0), or -1 if there is no next block.
+# The content is the rest of the line, newlines and backslashes are escaped with a backslash.
+FORMAT_MAGIC = "FCR"
+FORMAT_VERSION = 1
+
+_TYPE_CODES = {
+    StartBlock: "S",
+    EndBlock: "E",
+    CondBlock: "C",
+    InitBlock: "V",
+    CalcBlock: "N",
+}
+_INPUT_CODE = "I"
+_OUTPUT_CODE = "O"
+
+_DIRECTION_CODES = {
+    ArrowDirection.TOP: "t",
+    ArrowDirection.BOTTOM: "b",
+    ArrowDirection.LEFT: "l",
+    ArrowDirection.RIGHT: "r",
+}
+_DIRECTIONS = {code: direction for direction, code in _DIRECTION_CODES.items()}
+
+
+class ChartFileError(Exception):
+    pass
+
+
+def save_chart(path: str, blocks: list[BlockBase]) -> None:
+    with open(path, "w", encoding="UTF-8", newline="\n") as f:
+        write_chart(f, blocks)
+
+
+def write_chart(f: TextIO, blocks: list[BlockBase]) -> None:
+    indices = {id(block): i for i, block in enumerate(blocks)}
+
+    def index_of(block):
+        return -1 if block is None else indices[id(block)]
+
+    f.write(f"{FORMAT_MAGIC} {FORMAT_VERSION}\n")
+    for block in blocks:
+        if isinstance(block, IOBlock):
+            type_code = _INPUT_CODE if block.is_input else _OUTPUT_CODE
+        else:
+            type_code = _TYPE_CODES[type(block)]
+        x, y = block.pos
+        if isinstance(block, CondBlock):
+            links = (
+                f"{_DIRECTION_CODES[block.on_true.out_point]} {index_of(block.on_true.next_block)} "
+                f"{_DIRECTION_CODES[block.on_false.out_point]} {index_of(block.on_false.next_block)}"
+            )
+        else:
+            links = f"{_DIRECTION_CODES[block.out_point]} {index_of(block.next_block)}"
+        content = block.content.text.replace("\\", "\\\\").replace("\n", "\\n")
+        f.write(f"{type_code} {x} {y} {_DIRECTION_CODES[block.in_point]} {links} {content}\n")
+
+
+def load_chart(path: str, language: Language) -> list[BlockBase]:
+    """Loads the blocks of a chart, there is always exactly one StartBlock"""
+    with open(path, encoding="UTF-8", newline="\n") as f:
+        try:
+            return read_chart(f, language)
+        except ChartFileError as e:
+            raise ChartFileError(f"invalid chart file {path!r}: {e}") from e
+
+
+def read_chart(lines: Iterable[str], language: Language) -> list[BlockBase]:
+    lines = iter(lines)
+    header = next(lines, "").split()
+    if len(header) != 2 or header[0] != FORMAT_MAGIC:
+        raise ChartFileError("not a chart file")
+    if header[1] != str(FORMAT_VERSION):
+        raise ChartFileError(f"unsupported version {header[1]}")
+
+    blocks = []
+    links = []
+    start_blocks = 0
+    for line_no, line in enumerate(lines, 2):
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        try:
+            block, block_links = _parse_block(line, language)
+        except (ValueError, KeyError) as e:
+            raise ChartFileError(f"line {line_no} is not valid") from e
+        if isinstance(block, StartBlock):
+            start_blocks += 1
+        blocks.append(block)
+        links.append(block_links)
+
+    # the blocks can link to blocks that come after them, the links are set once all of them exist
+    for block, block_links in zip(blocks, links):
+        if isinstance(block, CondBlock):
+            block.on_true.out_point, block.on_true.next_block = _link(blocks, *block_links[0])
+            block.on_false.out_point, block.on_false.next_block = _link(blocks, *block_links[1])
+        else:
+            block.out_point, block.next_block = _link(blocks, *block_links[0])
+
+    if start_blocks != 1:
+        raise ChartFileError("a chart must have exactly one start block")
+    return blocks
+
+
+def _parse_block(line: str, language: Language) -> tuple[BlockBase, tuple]:
+    type_code = line[:1]
+    field_count = 8 if type_code == "C" else 6
+    fields = line.split(" ", field_count)
+    if len(fields) != field_count + 1:
+        raise ValueError("missing fields")
+    content = _unescape(fields[-1])
+
+    if type_code == "S":
+        block = StartBlock(content)
+    elif type_code == "E":
+        block = EndBlock(None, content)
+    elif type_code == _INPUT_CODE or type_code == _OUTPUT_CODE:
+        block = IOBlock(None, content, type_code == _INPUT_CODE)
+    elif type_code == "C":
+        block = CondBlock(
+            None, content,
+            language.CondBlock.true_branch.name,
+            language.CondBlock.false_branch.name
+        )
+    elif type_code == "V":
+        block = InitBlock(None, content)
+    elif type_code == "N":
+        block = CalcBlock(None, content)
+    else:
+        raise ValueError(f"unknown block type {type_code!r}")
+
+    block.pos = [_parse_number(fields[1]), _parse_number(fields[2])]
+    block.in_point = _DIRECTIONS[fields[3]]
+    if type_code == "C":
+        return block, ((_DIRECTIONS[fields[4]], int(fields[5])), (_DIRECTIONS[fields[6]], int(fields[7])))
+    return block, ((_DIRECTIONS[fields[4]], int(fields[5])),)
+
+
+def _parse_number(string: str) -> int | float:
+    try:
+        return int(string)
+    except ValueError:
+        return float(string)
+
+
+def _unescape(content: str) -> str:
+    if "\\" not in content:
+        return content
+    chars = []
+    i = 0
+    while i < len(content):
+        ch = content[i]
+        if ch == "\\" and i + 1 < len(content):
+            i += 1
+            ch = "\n" if content[i] == "n" else content[i]
+        chars.append(ch)
+        i += 1
+    return "".join(chars)
+
+
+def _link(blocks: list[BlockBase], out_point: str, next_idx: int) -> tuple[str, BlockBase | None]:
+    if next_idx == -1:
+        return out_point, None
+    if not 0 <= next_idx < len(blocks):
+        raise ChartFileError(f"block index {next_idx} out of range")
+    return out_point, blocks[next_idx]
@@ -0,0 +1,70 @@
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+import argparse
+import sys
+import pygame as pg
+from asset_manager import set_asset_path
+from chart_io import load_chart, ChartFileError
+from language_manager import Language
+from runner import Runner, RunnerError, TerminalLink, ExecutionError, StopExecution
+from text_rendering import load_fonts
+from ui_components import StartBlock
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run a flowchart from the command line, without the editor.")
+    arg_parser.add_argument("chart", help="path of the chart to run")
+    arg_parser.add_argument("--language", default="italian.txt", help="language file used for the messages")
+    arg_parser.add_argument(
+        "--profile", action="store_true",
+        help="print how many times each block was executed and the time spent in it once the execution ends"
+    )
+    arg_parser.add_argument("--profile-csv", metavar="PATH", help="write the profile of the execution as CSV to PATH")
+    args = arg_parser.parse_args()
+
+    # the blocks need the fonts to measure their text, the display is never opened
+    pg.font.init()
+    set_asset_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "_assets"))
+    load_fonts()
+    language = Language(args.language)
+
+    try:
+        blocks = load_chart(args.chart, language)
+    except (OSError, ChartFileError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    start_block = next(block for block in blocks if isinstance(block, StartBlock))
+
+    console = TerminalLink()
+    try:
+        runner = Runner(start_block, profile=args.profile or args.profile_csv is not None)
+    except RunnerError as e:
+        console.stderr_write(e.exe_err.format(language))
+        return 1
+
+    try:
+        error = runner.run(console)
+    except StopExecution:
+        error = ExecutionError("error.name.io_error", "error.msg.input_ended")
+    if runner.profile is not None:
+        write_profile(runner.profile, blocks, args)
+    if error is not None:
+        console.stderr_write(error.format(language))
+        return 1
+    return 0
+
+
+def write_profile(profile, blocks, args):
+    if args.profile:
+        profile.write_report(sys.stderr, blocks)
+    if args.profile_csv is not None:
+        try:
+            with open(args.profile_csv, "w", encoding="UTF-8", newline="") as f:
+                profile.write_csv(f, blocks)
+        except OSError as e:
+            print(e, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
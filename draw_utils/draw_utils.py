@@ -1,6 +1,12 @@
 import pygame as pg
 from math import hypot, ceil, floor, sqrt
 
+try:
+    import numpy as np
+except ImportError:
+    # the lines are drawn one pixel at a time
+    np = None
+
 _rect_cache = {}
 _parallelogram_cache = {}
 _rombus_cache = {}
@@ -225,6 +231,10 @@ def draw_line(surf: pg.Surface, color: _col_type, p1: _point_t, p2: _point_t, th
     max_dist = sqrt(1 + slope*slope) / 2
     h = sqrt(d_x*d_x + d_y*d_y)
 
+    if np is not None and surf.get_flags() & pg.SRCALPHA and surf.get_bytesize() == 4:
+        _draw_line_array(surf, color, ap, p1, p2, d_x, d_y, h, slope, steep, max_px, max_dist, thickness)
+        return
+
     if steep:
         for y in range(floor(p1.x), ceil(p2.x + 1)):
             base_x = int(round(p1.y + int(slope * (y - p1.x))))
@@ -241,6 +251,36 @@ def draw_line(surf: pg.Surface, color: _col_type, p1: _point_t, p2: _point_t, th
                 draw_pixel(surf, color, ap, x, base_y - i, p1, d_x, d_y, h, max_dist, thickness)
 
 
+def _draw_line_array(surf, color, ap, p1, p2, d_x, d_y, h, slope, steep, max_px, max_dist, thickness):
+    """
+    Draws the same pixels as the loops of draw_line computing all of them at once, the coordinates are swapped like
+    the points when the line is steep. Each pixel is checked only once, so the alpha it is compared with is the one
+    before the line is drawn.
+    """
+    columns = np.arange(floor(p1.x), ceil(p2.x + 1))
+    base = np.round(p1.y + np.trunc(slope * (columns - p1.x))).astype(np.int64)
+    u, v = np.broadcast_arrays(columns[:, None], base[:, None] + np.arange(1 - max_px, max_px))
+    x, y = (v, u) if steep else (u, v)
+    inside = (x >= 0) & (x < surf.get_width()) & (y >= 0) & (y < surf.get_height())
+    u, v, x, y = u[inside], v[inside], x[inside], y[inside]
+
+    p_dist = np.abs(d_x * (p1.y - v) - (p1.x - u) * d_y) / h
+    fully_inside = p_dist + max_dist <= thickness
+    alpha = np.where(
+        p_dist >= thickness,
+        127 * (1 - (p_dist - thickness) / max_dist),
+        128 + (127 * (thickness - p_dist) / max_dist)
+    ) * ap
+    alpha[fully_inside] = 255 * ap
+
+    surf_alpha = pg.surfarray.pixels_alpha(surf)
+    drawn = fully_inside | ((p_dist <= thickness + max_dist) & (surf_alpha[x, y] <= alpha))
+    x, y = x[drawn], y[drawn]
+    # like set_at, the alpha is truncated
+    surf_alpha[x, y] = alpha[drawn].astype(np.uint8)
+    pg.surfarray.pixels3d(surf)[x, y] = color[:3]
+
+
 def draw_lines(surf, color, closed, points, thickness):
     points2 = list(points[1:])
     if closed:
@@ -1 +1,2 @@
 from .editor import Editor
+from .frame_timings import FrameTimings
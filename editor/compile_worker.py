@@ -0,0 +1,65 @@
+import threading
+
+from runner import ExecutionError, cached_compilation
+from ui_components import BlockBase
+
+
+class CompileWorker:
+    """
+    Compiles the blocks in a background thread as they are edited, the compiled trees end up in the compile cache so
+    that starting the execution does not need to compile them again
+    """
+    def __init__(self):
+        # the blocks waiting to be compiled with the text to compile, a block is compiled only with its latest text
+        self._pending: dict[int, tuple[BlockBase, str]] = {}
+        self._results: list[tuple[int, str, ExecutionError | None]] = []
+        self._condition = threading.Condition()
+        self._compiling = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self.__run, name="compile-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, block: BlockBase, text: str):
+        with self._condition:
+            self._pending[id(block)] = (block, text)
+            self._condition.notify()
+
+    def discard(self, block: BlockBase):
+        """Forgets a block that is waiting to be compiled"""
+        with self._condition:
+            self._pending.pop(id(block), None)
+
+    def get_results(self) -> list[tuple[int, str, ExecutionError | None]]:
+        """Returns the id, the compiled text and the error of the blocks compiled since the last call"""
+        with self._condition:
+            results = self._results
+            self._results = []
+        return results
+
+    def is_idle(self) -> bool:
+        """Whether all the blocks submitted were compiled and their results were taken"""
+        with self._condition:
+            return not self._pending and not self._compiling and not self._results
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify()
+        self._thread.join()
+
+    def __run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                block_id, (block, text) = self._pending.popitem()
+                self._compiling = True
+
+            ast = cached_compilation(block, text)
+            error = ast if isinstance(ast, ExecutionError) else None
+            with self._condition:
+                self._results.append((block_id, text, error))
+                self._compiling = False
@@ -3,4 +3,27 @@ from text_rendering.constants import SELECTION_COLOR
 EDITOR_BG_COLOR = (45, 47, 51)
 GUIDELINE_COLOR = (124, 128, 138)
 AXIS_COLOR = (96, 99, 107)
+# space between the dots of the background grid
+GRID_DOT_SPACING = 50
 SELECTION_BORDER_COLOR = SELECTION_COLOR
+# color of the blocks where the most time was spent in a profiled execution
+HEAT_COLOR = (237, 85, 59)
+HEAT_MAX_ALPHA = 150
+# size of the cells of the grid used to find the blocks in an area
+SPATIAL_INDEX_CELL_SIZE = 256
+# how far from the blocks it links the path of an arrow can go
+ARROW_ROUTE_MARGIN = 32
+# how far from its rectangle a block can draw, the names of the branches of a conditional block are drawn outside it
+BLOCK_DRAW_MARGIN = 64
+# when more areas of the screen change they are drawn again as a single area
+MAX_DIRTY_AREAS = 16
+# the sidebars draw their border this far to the left of their rectangle
+SIDEBAR_BORDER_WIDTH = 2
+# where a chart opened without a path is saved, relative to the working directory
+DEFAULT_CHART_PATH = "untitled.fcr"
+# how often in seconds the state of the runner is checked when it does not report anything
+RUNNER_POLL_INTERVAL = 0.25
+# number of frames whose timings are kept for the overlay
+FRAME_TIMINGS_SIZE = 120
+FRAME_TIMINGS_BG_COLOR = (30, 31, 34)
+FRAME_TIMINGS_PADDING = 6
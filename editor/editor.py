@@ -1,18 +1,32 @@
+import os
+import sys
+from typing import Callable
+
 import pygame as pg
 
-from runner import Runner, RunnerError
+from chart_io import load_chart, save_chart, ChartFileError
+from runner import Runner, RunnerError, TextValidator, ExecutionError, Profile
 from text_rendering import mono_line_height
 from ui_components import (
     InfoBar, draw_arrows, StartBlock, EndBlock, BlockBase, IOBlock, CondBlock, InitBlock, CalcBlock, BlockState,
-    RunnerBar
+    RunnerBar, TextBox
 )
 from ui_components.blocks import Pos, _OptionBlock
 
-from .constants import GUIDELINE_COLOR, AXIS_COLOR, EDITOR_BG_COLOR, SELECTION_BORDER_COLOR
+from .compile_worker import CompileWorker
+from .spatial_index import SpatialIndex
+from .constants import (
+    GUIDELINE_COLOR, AXIS_COLOR, EDITOR_BG_COLOR, SELECTION_BORDER_COLOR, HEAT_COLOR, HEAT_MAX_ALPHA, BLOCK_DRAW_MARGIN,
+    MAX_DIRTY_AREAS, SIDEBAR_BORDER_WIDTH, RUNNER_POLL_INTERVAL, GRID_DOT_SPACING,
+    DEFAULT_CHART_PATH
+)
+
+# events after which the whole window is drawn again
+_REDRAW_EVENTS = (pg.VIDEOEXPOSE, pg.VIDEORESIZE, pg.WINDOWEXPOSED, pg.WINDOWSIZECHANGED)
 
 
 class Editor:
-    def __init__(self, language):
+    def __init__(self, language, on_runner_state: Callable[[], None] | None = None):
         self.start_block = StartBlock(language.StartBlock.content)
         end_block = EndBlock(self.start_block, language.EndBlock.content)
         self.langauge = language
@@ -22,6 +36,7 @@ class Editor:
         end_block.pos = [end_block_x, self.start_block.h + mono_line_height() * 3]
 
         self.blocks: list[BlockBase] = [self.start_block, end_block]
+        self.block_index = SpatialIndex(self.blocks)
         self.dragging_blocks: list[BlockBase] | None = None
         self.has_moved = False
         self.dragging_global = False
@@ -29,11 +44,38 @@ class Editor:
         self._pending_next_block = None
         self.fake_pending_next_block = None
         self.runner: Runner | None = None
+        # called from another thread when the running chart reports a new state, see Runner
+        self.on_runner_state = on_runner_state
         self.select_start = (0, 0)
         self.select_area = pg.Rect(-1, -1, 0, 0)
         self.selected_blocks: list[BlockBase] = []
         self.global_offset = [0, 0]
         self.sidebar: InfoBar | RunnerBar | None = None
+        self.chart_path: str | None = None
+
+        self.compile_worker = CompileWorker()
+        # the last text of each block sent to the compile worker and the errors found in the blocks by it
+        self._compiled_texts: dict[int, str] = {}
+        self.block_errors: dict[int, ExecutionError] = {}
+        # the block that caused the last failed start of the execution
+        self.failed_block_id: int | None = None
+        # the profile of the last profiled execution, shown over the blocks until it is dismissed
+        self.profile: Profile | None = None
+        self._profile_heat: dict[int, float] = {}
+        # a profiled execution that was stopped and is still sending its profile
+        self._stopped_runner: Runner | None = None
+
+        # what was drawn in the last frame, the areas that changed since then are drawn again
+        self._full_redraw = True
+        self._damage: list[pg.Rect] = []
+        self._sidebar_dirty = False
+        self._sidebar_settling = False
+        self._drawn_screen_size: tuple[int, int] | None = None
+        self._drawn_offset: tuple[int, int] | None = None
+        self._drawn_select_area: pg.Rect | None = None
+        # the dots of the background grid, see __background_grid_tile
+        self._grid_tile: pg.Surface | None = None
+        self._grid_tile_key: tuple | None = None
 
     @property
     def pending_next_block(self):
@@ -44,6 +86,48 @@ class Editor:
         self._pending_next_block = value
         self.fake_pending_next_block = value
 
+    def load(self, path: str):
+        """Replaces the blocks with the ones of the chart at path, the editor is left unchanged if it is not valid"""
+        try:
+            blocks = load_chart(path, self.langauge)
+        except (OSError, ChartFileError) as e:
+            print(e)
+            return
+        self.stop_execution()
+        self._stopped_runner = None
+        self.blocks = blocks
+        self.block_index = SpatialIndex(blocks)
+        self.start_block = next(block for block in blocks if isinstance(block, StartBlock))
+        self.selected_blocks = []
+        self.pending_next_block = None
+        self.sidebar = None
+        self.chart_path = path
+        self._compiled_texts.clear()
+        self.block_errors.clear()
+        self.failed_block_id = None
+        # the profile of the previous chart refers to blocks that do not exist anymore
+        self.profile = None
+        self._profile_heat = {}
+        for block in blocks:
+            self.__check_block_text(block)
+        self.redraw()
+
+    def save(self, path: str | None = None):
+        if path is None:
+            path = self.chart_path
+        # a chart opened without a path is not lost, it is saved in the working directory
+        is_default = path is None
+        if is_default:
+            path = DEFAULT_CHART_PATH
+        try:
+            save_chart(path, self.blocks)
+        except OSError as e:
+            print(e)
+            return
+        if is_default:
+            print(f"chart saved to {os.path.abspath(path)!r}")
+        self.chart_path = path
+
     def __send_input(self, textbox):
         if self.runner is not None and textbox.text:
             self.runner.in_q.put(textbox.text)
@@ -51,36 +135,39 @@ class Editor:
         textbox.placeholder_text = ""
 
     def intersect_point(self, point) -> BlockBase | None:
-        point = list(Pos(*point) - self.global_offset)
-        for b in reversed(self.blocks):
-            if b.rect.collidepoint(point):
-                return b
-        return None
+        blocks = self.intersect_all_point(point)
+        return blocks[0] if blocks else None
 
     def intersect_all_point(self, point) -> list[BlockBase]:
-        blocks = []
+        """Returns the blocks under point, the one drawn on top first"""
         point = list(Pos(*point) - self.global_offset)
-        for b in reversed(self.blocks):
-            if b.rect.collidepoint(point):
-                blocks.append(b)
+        blocks = self.block_index.blocks_at(point)
+        blocks.reverse()
         return blocks
 
     def intersect_rect(self, rect: pg.Rect) -> BlockBase | None:
-        rect.x -= self.global_offset[0]
-        rect.y -= self.global_offset[1]
-        for b in reversed(self.blocks):
-            if b.inside(rect):
-                return b
-        return None
+        blocks = self.intersect_all_rect(rect)
+        return blocks[-1] if blocks else None
 
     def intersect_all_rect(self, rect: pg.Rect) -> list[BlockBase]:
-        blocks = []
-        rect.x -= self.global_offset[0]
-        rect.y -= self.global_offset[1]
-        for b in self.blocks:
-            if b.inside(rect):
-                blocks.append(b)
-        return blocks
+        """Returns the blocks completely inside rect"""
+        rect = rect.move(-self.global_offset[0], -self.global_offset[1])
+        return [b for b in self.block_index.blocks_in(rect) if rect.contains(self.block_index.rect(b))]
+
+    def view_rect(self, screen: pg.Surface) -> pg.Rect:
+        """The area of the chart visible on the screen"""
+        return pg.Rect((-self.global_offset[0], -self.global_offset[1]), screen.get_size())
+
+    def add_block(self, block: BlockBase):
+        self.blocks.append(block)
+        self.block_index.add(block)
+        self.block_index.update_links(block)
+        self.__check_block_text(block)
+
+    def __link_pending_block(self, next_block: BlockBase | None):
+        self.pending_next_block.next_block = next_block
+        # when the pending block is a branch of a conditional block this is the conditional block
+        self.block_index.update_links(self.fake_pending_next_block)
 
     def update_select_area(self):
         mp = pg.mouse.get_pos()
@@ -103,7 +190,7 @@ class Editor:
         if block is not None:
             if self.pending_next_block is not None:
                 if not isinstance(block, StartBlock):
-                    self.pending_next_block.next_block = block
+                    self.__link_pending_block(block)
                 self.pending_next_block = None
                 return
 
@@ -140,6 +227,7 @@ class Editor:
             self.has_moved = True
             for block in self.dragging_blocks:
                 block.pos += event.rel
+                self.block_index.update(block)
         elif self.dragging_global:
             self.global_offset[0] += event.rel[0]
             self.global_offset[1] += event.rel[1]
@@ -155,6 +243,12 @@ class Editor:
         elif key == pg.K_F6:
             self.start_execution(True)
             return
+        elif key == pg.K_F7:
+            self.start_execution(turbo=True)
+            return
+        elif key == pg.K_F8:
+            self.start_execution(turbo=True, profile=True)
+            return
         elif self.runner is not None:
             if key == pg.K_b and pg.key.get_mods() & pg.KMOD_CTRL:
                 self.stop_execution()
@@ -167,25 +261,30 @@ class Editor:
                 self.runner.advance()
             return
 
-        if key == pg.K_i:
+        if key == pg.K_s and pg.key.get_mods() & pg.KMOD_CTRL:
+            self.save()
+        elif key == pg.K_ESCAPE:
+            self.profile = None
+            self.redraw()
+        elif key == pg.K_i:
             input_block = IOBlock(None, "", True)
-            self.blocks.append(input_block)
+            self.add_block(input_block)
         elif key == pg.K_o:
             output_block = IOBlock(None, "", False)
-            self.blocks.append(output_block)
+            self.add_block(output_block)
         elif key == pg.K_c:
             cond_block = CondBlock(
                 None, "",
                 self.langauge.CondBlock.true_branch.name,
                 self.langauge.CondBlock.false_branch.name
             )
-            self.blocks.append(cond_block)
+            self.add_block(cond_block)
         elif key == pg.K_n:
             calc_block = CalcBlock(None, "")
-            self.blocks.append(calc_block)
+            self.add_block(calc_block)
         elif key == pg.K_v:
             var_block = InitBlock(None, "")
-            self.blocks.append(var_block)
+            self.add_block(var_block)
         elif key == pg.K_w and len(self.selected_blocks) == 1:
             self.pending_next_block = self.selected_blocks[0]
             if isinstance(self.selected_blocks[0], EndBlock) or isinstance(self.selected_blocks[0], CondBlock):
@@ -206,7 +305,7 @@ class Editor:
             self.selected_blocks = []
         elif key in (pg.K_DELETE, pg.K_BACKSPACE):
             if self.pending_next_block is not None:
-                self.pending_next_block.next_block = None
+                self.__link_pending_block(None)
                 self.pending_next_block = None
             else:
                 blocks = self.selected_blocks.copy()
@@ -214,9 +313,17 @@ class Editor:
                     self.delete_block(block)
 
     def handle_event(self, event: pg.event.Event):
-        if self.sidebar is not None and self.sidebar.handle_event(event):
-            self.pending_next_block = None
-            return
+        if event.type in _REDRAW_EVENTS:
+            self.redraw()
+        if self.sidebar is not None:
+            # anything in the sidebar can change with the event
+            self._sidebar_dirty = True
+            if self.sidebar.handle_event(event):
+                if event.type == pg.MOUSEBUTTONDOWN or event.type == pg.MOUSEBUTTONUP:
+                    # the arrow point selectors change the arrows of the block
+                    self.redraw()
+                self.pending_next_block = None
+                return
 
         if event.type == pg.MOUSEBUTTONDOWN:
             self.__handle_mouse_button_down_event(event)
@@ -227,15 +334,25 @@ class Editor:
         elif event.type == pg.KEYDOWN:
             self.__handle_keydown_event(event)
 
-    def start_execution(self, start_paused=False):
+    def start_execution(self, start_paused=False, turbo=False, profile=False):
         self.selected_blocks = []
         self.pending_next_block = None
         self.selecting = False
+        self.profile = None
+        self._stopped_runner = None
         try:
-            self.runner = Runner(self.start_block, delay=0.5)
+            self.runner = Runner(
+                self.start_block,
+                delay=0.5,
+                turbo=turbo,
+                profile=profile,
+                on_state=self.on_runner_state
+            )
         except RunnerError as e:
             print(e.exe_err.format(self.langauge))
+            self.failed_block_id = e.block_id
             return
+        self.failed_block_id = None
         self.runner.start(start_paused)
         self.sidebar = RunnerBar(self.runner, self.langauge)
 
@@ -243,9 +360,28 @@ class Editor:
         if self.runner is None:
             return
         self.runner.stop()
+        if self.runner.profile_pending:
+            self._stopped_runner = self.runner
+        else:
+            self.__show_profile(self.runner.profile)
         self.runner = None
         self.sidebar = None
 
+    def __show_profile(self, profile: Profile | None):
+        if profile is None:
+            return
+        self.profile = profile
+        self._profile_heat = self.profile.heat_map()
+        self.profile.write_report(sys.stdout, self.blocks)
+        self.redraw()
+
+    def __check_stopped_runner(self):
+        """Shows the profile of the stopped execution once it is received"""
+        if self._stopped_runner is None or self._stopped_runner.profile_pending:
+            return
+        self.__show_profile(self._stopped_runner.profile)
+        self._stopped_runner = None
+
     def delete_block(self, block):
         # These blocks cannot be deleted
         if isinstance(block, StartBlock) or isinstance(block, EndBlock) or isinstance(block, _OptionBlock):
@@ -255,15 +391,43 @@ class Editor:
             try:
                 if block is b.next_block:
                     b.next_block = None
+                    self.block_index.update_links(b)
             except ValueError:
                 b: CondBlock
                 if block is b.on_true.next_block:
                     b.on_true.next_block = None
                 if block is b.on_false.next_block:
                     b.on_false.next_block = None
+                self.block_index.update_links(b)
 
         self.blocks.remove(block)
+        self.block_index.remove(block)
         self.selected_blocks.remove(block)
+        self.compile_worker.discard(block)
+        self._compiled_texts.pop(id(block), None)
+        self.block_errors.pop(id(block), None)
+
+    def __update_diagnostics(self):
+        for block_id, text, error in self.compile_worker.get_results():
+            # the block was edited again or deleted since the text was sent
+            if self._compiled_texts.get(block_id) is not text:
+                continue
+            if error is None:
+                self.block_errors.pop(block_id, None)
+            else:
+                self.block_errors[block_id] = error
+
+    def __check_block_text(self, block: BlockBase):
+        """Sends the block to the compile worker if its text changed"""
+        text = block.content.text
+        if self._compiled_texts.get(id(block)) is text or not block.editable:
+            return
+        if id(block) in self._compiled_texts:
+            # the size of the block changes with its text
+            self.block_index.update(block)
+        self._compiled_texts[id(block)] = text
+        self.compile_worker.submit(block, text)
+        self.failed_block_id = None
 
     def __update_info_bar(self):
         if self.runner is not None:
@@ -271,28 +435,100 @@ class Editor:
         if len(self.selected_blocks) != 1:
             self.sidebar = None
         elif self.sidebar != self.selected_blocks[0]:
-            self.sidebar = InfoBar(self.selected_blocks[0], self.langauge)
+            block = self.selected_blocks[0]
+            self.sidebar = InfoBar(block, self.langauge, TextValidator(block).validate)
 
-    def __draw_background_grid(self, screen):
+    def __draw_background_grid(self, screen: pg.Surface, area: pg.Rect):
         screen_w = screen.get_width()
         screen_h = screen.get_height()
-        offset_x = self.global_offset[0] % 50
-        offset_y = self.global_offset[1] % 50
         if 0 <= self.global_offset[1] <= screen_w:
             pg.draw.line(screen, AXIS_COLOR, (0, self.global_offset[1]), (screen_w, self.global_offset[1]))
         if 0 <= self.global_offset[0] <= screen_w:
             pg.draw.line(screen, AXIS_COLOR, (self.global_offset[0], 0), (self.global_offset[0], screen_h))
 
-        for x in range(offset_x, screen_w + offset_x, 50):
-            for y in range(offset_y, screen_h + offset_y, 50):
-                screen.set_at((x, y), GUIDELINE_COLOR)
-
-    def draw(self, screen: pg.Surface):
-        screen.fill(EDITOR_BG_COLOR)
-
+        tile = self.__background_grid_tile(screen)
+        # the tile starts at the last column and row of dots before the top left corner of the screen
+        tile_x = self.global_offset[0] % GRID_DOT_SPACING - GRID_DOT_SPACING
+        tile_y = self.global_offset[1] % GRID_DOT_SPACING - GRID_DOT_SPACING
+        screen.blit(tile, area.topleft, area.move(-tile_x, -tile_y))
+
+    def __background_grid_tile(self, screen: pg.Surface) -> pg.Surface:
+        """
+        A transparent surface with the dots of the background grid, it is larger than the screen by the space between
+        the dots so that it covers it with any offset. It is created again only when the window is resized.
+        """
+        key = (screen.get_size(), GUIDELINE_COLOR)
+        if self._grid_tile_key == key:
+            return self._grid_tile
+        w = screen.get_width() + GRID_DOT_SPACING
+        h = screen.get_height() + GRID_DOT_SPACING
+        tile = pg.Surface((w, h), 0, screen)
+        tile.fill(EDITOR_BG_COLOR)
+        with pg.PixelArray(tile) as pixels:
+            pixels[::GRID_DOT_SPACING, ::GRID_DOT_SPACING] = GUIDELINE_COLOR
+        # most of the tile is transparent, run-length encoding skips it quickly
+        tile.set_colorkey(EDITOR_BG_COLOR, pg.RLEACCEL)
+        self._grid_tile = tile
+        self._grid_tile_key = key
+        return tile
+
+    def __block_state(self, block: BlockBase) -> BlockState:
+        if self.runner is not None:
+            if self.runner.current_block == id(block):
+                return BlockState.ERROR if self.runner.error_occurred else BlockState.RUNNING
+        elif block in self.selected_blocks:
+            return BlockState.SELECTED
+        elif block is self.fake_pending_next_block:
+            return BlockState.PENDING_NEXT_BLOCK
+        elif id(block) in self.block_errors or id(block) == self.failed_block_id:
+            return BlockState.ERROR
+        return BlockState.IDLE
+
+    def __focused_textbox(self) -> TextBox | None:
+        """The textbox of the sidebar with a blinking caret, if any"""
+        if isinstance(self.sidebar, InfoBar):
+            textbox = self.sidebar.tb_content
+        elif isinstance(self.sidebar, RunnerBar):
+            textbox = self.sidebar.input_textbox
+        else:
+            return None
+        if textbox is None or not textbox.focused:
+            return None
+        return textbox
+
+    def redraw(self):
+        """Makes the next call to draw draw the whole window"""
+        self._full_redraw = True
+
+    def frame_timeout(self) -> float | None:
+        """
+        The time in seconds after which the next frame must be drawn even if no event is received, None if nothing
+        changes on the screen until an event is received
+        """
+        if self._full_redraw or self._damage or self._sidebar_dirty or self._sidebar_settling:
+            return 0
+        if self.block_index.has_damage() or not self.compile_worker.is_idle():
+            return 0
+        timeouts = []
+        if self.runner is not None or self._stopped_runner is not None:
+            # the runner wakes up the editor with on_runner_state, but the messages it sends can arrive later
+            timeouts.append(RUNNER_POLL_INTERVAL)
+        textbox = self.__focused_textbox()
+        if textbox is not None:
+            timeouts.append(textbox.caret_blink_timeout())
+        return min(timeouts, default=None)
+
+    def __update_state(self, screen: pg.Surface):
+        """Updates the editor before drawing, collecting the areas that changed"""
+        prev_sidebar = self.sidebar
+        # the text of a block is changed only from the info bar
+        if isinstance(self.sidebar, InfoBar) and self.sidebar.block in self.block_index:
+            self.__check_block_text(self.sidebar.block)
         self.__update_info_bar()
-        self.__draw_background_grid(screen)
-        draw_arrows(screen, self.blocks, self.global_offset)
+
+        if (self.runner is not None or self.__focused_textbox() is not None) and not self._sidebar_settling:
+            # the runner bar and the caret change without events, a settling sidebar is already drawn
+            self._sidebar_dirty = True
 
         if self.runner is not None:
             self.runner.update_state()
@@ -303,25 +539,130 @@ class Editor:
             if not self.runner.is_running():
                 self.stop_execution()
 
-        for block in self.blocks:
-            state = BlockState.IDLE
-            if self.runner is not None:
-                if self.runner.current_block == id(block):
-                    state = BlockState.ERROR if self.runner.error_occurred else BlockState.RUNNING
-            elif block in self.selected_blocks:
-                state = BlockState.SELECTED
-            elif block is self.fake_pending_next_block:
-                state = BlockState.PENDING_NEXT_BLOCK
-            block.state = state
+        self.__check_stopped_runner()
+        self.__update_diagnostics()
+
+        if self.sidebar is not prev_sidebar \
+                or screen.get_size() != self._drawn_screen_size \
+                or tuple(self.global_offset) != self._drawn_offset:
+            self._full_redraw = True
+
+        view = self.view_rect(screen)
+        for block in self.block_index.blocks_in(view.inflate(BLOCK_DRAW_MARGIN * 2, BLOCK_DRAW_MARGIN * 2)):
+            state = self.__block_state(block)
+            if getattr(block, "state", None) != state:
+                block.state = state
+                self.block_index.damage(block)
+
+        # the info bar shows the position and the size of the block
+        if self.block_index.has_damage():
+            self._sidebar_dirty = True
+
+        select_area = self.select_area.inflate(2, 2) if self.selecting and self.runner is None else None
+        if select_area != self._drawn_select_area:
+            if self._drawn_select_area is not None:
+                self._damage.append(self._drawn_select_area)
+            if select_area is not None:
+                self._damage.append(select_area)
+            self._drawn_select_area = select_area
+
+    def __dirty_areas(self, screen: pg.Surface) -> list[pg.Rect]:
+        """Returns the areas of the screen that must be drawn again"""
+        screen_rect = screen.get_rect()
+        chart_damage = self.block_index.pop_damage()
+        damage = self._damage
+        self._damage = []
+        if self._full_redraw:
+            self._full_redraw = False
+            return [screen_rect]
+
+        areas = [rect.move(self.global_offset) for rect in chart_damage] + damage
+        areas = [area.clip(screen_rect) for area in areas]
+        areas = [area for area in areas if area.w > 0 and area.h > 0]
+        if len(areas) > MAX_DIRTY_AREAS:
+            areas = [areas[0].unionall(areas[1:])]
+        return areas
+
+    def draw(self, screen: pg.Surface) -> list[pg.Rect]:
+        """Draws the parts of the editor that changed since the last call, returns the areas of the screen drawn"""
+        self.__update_state(screen)
+        full_redraw = self._full_redraw
+        areas = self.__dirty_areas(screen)
+        for area in areas:
+            self.__draw_chart(screen, area)
+
+        if self.sidebar is not None:
+            self.sidebar.apply_constraints()
+            sidebar_area = self.__sidebar_area()
+            changed = full_redraw or self._sidebar_dirty or any(sidebar_area.colliderect(area) for area in areas)
+            if changed or self._sidebar_settling:
+                self.__draw_sidebar(screen, sidebar_area)
+                new_sidebar_area = self.__sidebar_area()
+                if new_sidebar_area != sidebar_area:
+                    # the sidebar was resized
+                    self.__draw_chart(screen, sidebar_area)
+                    self.__draw_sidebar(screen, new_sidebar_area)
+                areas.append(sidebar_area.union(new_sidebar_area))
+            # the layout of the sidebar uses the sizes of its components in the last frame, after a change it is
+            # drawn once more to let it settle
+            self._sidebar_settling = changed
+        else:
+            self._sidebar_settling = False
+        self._sidebar_dirty = False
+
+        self._drawn_screen_size = screen.get_size()
+        self._drawn_offset = tuple(self.global_offset)
+        return areas
+
+    def __sidebar_area(self) -> pg.Rect:
+        """The area of the screen covered by the sidebar and its border"""
+        rect = self.sidebar.rect
+        return pg.Rect(rect.x - SIDEBAR_BORDER_WIDTH, rect.y, rect.w + SIDEBAR_BORDER_WIDTH, rect.h)
+
+    def __draw_sidebar(self, screen: pg.Surface, area: pg.Rect):
+        # the sidebar does not cover the chart around its border
+        self.__draw_chart(screen, pg.Rect(area.x, area.y, SIDEBAR_BORDER_WIDTH, area.h))
+        # what does not fit in the sidebar would be drawn over the chart
+        screen.set_clip(area)
+        self.sidebar.draw(screen)
+        screen.set_clip(None)
+
+    def __draw_chart(self, screen: pg.Surface, area: pg.Rect):
+        """Draws the blocks and the arrows inside an area of the screen"""
+        screen.set_clip(area)
+        screen.fill(EDITOR_BG_COLOR, area)
+        self.__draw_background_grid(screen, area)
+
+        chart_area = area.move(-self.global_offset[0], -self.global_offset[1])
+        draw_arrows(screen, self.block_index.arrows_in(chart_area), self.global_offset)
+
+        blocks = self.block_index.blocks_in(chart_area.inflate(BLOCK_DRAW_MARGIN * 2, BLOCK_DRAW_MARGIN * 2))
+        for block in blocks:
             block.pos += self.global_offset
             block.draw(screen)
             block.pos -= self.global_offset
 
-        if self.sidebar is not None:
-            self.sidebar.draw(screen)
+        if self.profile is not None and self.runner is None:
+            self.__draw_profile(screen, area, blocks)
 
         if self.selecting and self.runner is None:
             pg.draw.rect(screen, SELECTION_BORDER_COLOR, self.select_area, 1)
+        screen.set_clip(None)
+
+    def __draw_profile(self, screen: pg.Surface, area: pg.Rect, blocks: list[BlockBase]):
+        """Covers each executed block with a color that is more opaque the more time was spent in it"""
+        overlay = pg.Surface(area.size, pg.SRCALPHA)
+        for block in blocks:
+            heat = self._profile_heat.get(id(block))
+            if heat is None:
+                continue
+            rect = block.rect.move(self.global_offset[0] - area.x, self.global_offset[1] - area.y)
+            overlay.fill((*HEAT_COLOR, int(HEAT_MAX_ALPHA * heat)), rect)
+        screen.blit(overlay, area.topleft)
 
     def quit(self):
         self.stop_execution()
+        if self._stopped_runner is not None:
+            # the process of the execution must not outlive the editor
+            self._stopped_runner.wait_stopped()
+        self.compile_worker.stop()
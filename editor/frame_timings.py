@@ -0,0 +1,60 @@
+from collections import deque
+
+import pygame as pg
+
+from text_rendering import write_mono_text
+
+from .constants import FRAME_TIMINGS_SIZE, FRAME_TIMINGS_BG_COLOR, FRAME_TIMINGS_PADDING
+
+
+class FrameTimings:
+    """The time spent handling the events, drawing and updating the display in the last frames"""
+    def __init__(self):
+        # the start, the event handling time, the drawing time and the display update time of each frame
+        self._frames: deque[tuple[float, float, float, float]] = deque(maxlen=FRAME_TIMINGS_SIZE)
+        self.visible = False
+        self._drawn_area: pg.Rect | None = None
+
+    def record(self, start: float, events_time: float, draw_time: float, flip_time: float):
+        self._frames.append((start, events_time, draw_time, flip_time))
+
+    def fps(self) -> float:
+        """The frames drawn per second, the time waiting for events is included"""
+        if len(self._frames) < 2:
+            return 0
+        elapsed = self._frames[-1][0] - self._frames[0][0]
+        return (len(self._frames) - 1) / elapsed if elapsed > 0 else 0
+
+    def averages(self) -> tuple[float, float, float]:
+        """The average event handling, drawing and display update times in seconds"""
+        if not self._frames:
+            return 0, 0, 0
+        frame_count = len(self._frames)
+        return (
+            sum(frame[1] for frame in self._frames) / frame_count,
+            sum(frame[2] for frame in self._frames) / frame_count,
+            sum(frame[3] for frame in self._frames) / frame_count
+        )
+
+    def hide(self):
+        """Hides the overlay, what it covered must be drawn again"""
+        self.visible = False
+        self._drawn_area = None
+
+    def draw(self, screen: pg.Surface) -> pg.Rect:
+        """Draws the timings in the top left corner, returns the area of the screen drawn"""
+        events_time, draw_time, flip_time = self.averages()
+        text = f"{self.fps():5.1f} fps\n" \
+               f"events {events_time * 1000:6.2f} ms\n" \
+               f"draw   {draw_time * 1000:6.2f} ms\n" \
+               f"flip   {flip_time * 1000:6.2f} ms"
+        text_surf = write_mono_text(text)
+        area = text_surf.get_rect().inflate(FRAME_TIMINGS_PADDING * 2, FRAME_TIMINGS_PADDING * 2)
+        area.topleft = (0, 0)
+        # the text is shorter for some values, what was drawn before is covered
+        if self._drawn_area is not None:
+            area.union_ip(self._drawn_area)
+        pg.draw.rect(screen, FRAME_TIMINGS_BG_COLOR, area)
+        screen.blit(text_surf, (FRAME_TIMINGS_PADDING, FRAME_TIMINGS_PADDING))
+        self._drawn_area = area
+        return area
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import pygame as pg
+
+from ui_components import BlockBase, CondBlock
+
+from .constants import SPATIAL_INDEX_CELL_SIZE, ARROW_ROUTE_MARGIN, BLOCK_DRAW_MARGIN
+
+
+class _Grid:
+    """A uniform grid that finds the blocks whose rectangle collides with an area, the blocks are stored by id"""
+    def __init__(self):
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._block_cells: dict[int, tuple[int, int, int, int]] = {}
+
+    @staticmethod
+    def _cell_range(rect: pg.Rect) -> tuple[int, int, int, int]:
+        return (
+            rect.left // SPATIAL_INDEX_CELL_SIZE,
+            rect.top // SPATIAL_INDEX_CELL_SIZE,
+            (rect.right - 1) // SPATIAL_INDEX_CELL_SIZE,
+            (rect.bottom - 1) // SPATIAL_INDEX_CELL_SIZE
+        )
+
+    def set(self, block_id: int, rect: pg.Rect):
+        cell_range = self._cell_range(rect)
+        prev_range = self._block_cells.get(block_id)
+        if prev_range == cell_range:
+            return
+        if prev_range is not None:
+            self.remove(block_id)
+        self._block_cells[block_id] = cell_range
+        left, top, right, bottom = cell_range
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self._cells.get((x, y))
+                if cell is None:
+                    self._cells[x, y] = {block_id}
+                else:
+                    cell.add(block_id)
+
+    def remove(self, block_id: int):
+        cell_range = self._block_cells.pop(block_id, None)
+        if cell_range is None:
+            return
+        left, top, right, bottom = cell_range
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self._cells[x, y]
+                cell.discard(block_id)
+                if not cell:
+                    del self._cells[x, y]
+
+    def query(self, rect: pg.Rect) -> set[int]:
+        """Returns the blocks in the cells covered by rect, they may not collide with it"""
+        left, top, right, bottom = self._cell_range(rect)
+        blocks = set()
+        if (right - left + 1) * (bottom - top + 1) > len(self._cells):
+            # the area is larger than the part of the grid that is used
+            for (x, y), cell in self._cells.items():
+                if left <= x <= right and top <= y <= bottom:
+                    blocks.update(cell)
+            return blocks
+
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self._cells.get((x, y))
+                if cell is not None:
+                    blocks.update(cell)
+        return blocks
+
+
+class SpatialIndex:
+    """
+    Keeps the rectangles of the blocks in a uniform grid to find the blocks and the arrows in an area without
+    checking all of them. The index must be updated each time a block is added, removed, moved, resized or linked to
+    a different block. The blocks are returned in the order they were added, which is the order they are drawn in.
+    The areas of the chart that must be drawn again because of these changes are collected until pop_damage is called.
+    """
+    def __init__(self, blocks: Iterable[BlockBase] = ()):
+        self._blocks = _Grid()
+        # each block is in this grid with the area that contains the arrows that start from it
+        self._arrows = _Grid()
+        self._block_of: dict[int, BlockBase] = {}
+        self._rects: dict[int, pg.Rect] = {}
+        self._arrow_areas: dict[int, pg.Rect] = {}
+        self._damage: list[pg.Rect] = []
+        self._order: dict[int, int] = {}
+        self._next_order = 0
+        # the blocks that each block points to and the blocks pointing to it
+        self._links_out: dict[int, tuple[int, ...]] = {}
+        self._links_in: dict[int, set[int]] = {}
+
+        blocks = list(blocks)
+        for block in blocks:
+            self.add(block)
+        for block in blocks:
+            self.update_links(block)
+        self._damage.clear()
+
+    def __contains__(self, block: BlockBase) -> bool:
+        return id(block) in self._block_of
+
+    def __len__(self):
+        return len(self._block_of)
+
+    def add(self, block: BlockBase):
+        """Adds a block after all the others, its links are not indexed until update_links is called"""
+        block_id = id(block)
+        self._block_of[block_id] = block
+        self._order[block_id] = self._next_order
+        self._next_order += 1
+        self._links_out[block_id] = ()
+        self._links_in[block_id] = set()
+        self.update(block)
+
+    def remove(self, block: BlockBase):
+        """Removes a block, the blocks that were linked to it must be unlinked before"""
+        block_id = id(block)
+        for next_id in self._links_out.pop(block_id):
+            self._links_in[next_id].discard(block_id)
+        del self._links_in[block_id]
+        self.damage(block)
+        self.__set_arrow_area(block_id, None)
+        self._blocks.remove(block_id)
+        del self._block_of[block_id]
+        del self._rects[block_id]
+        del self._order[block_id]
+
+    def update(self, block: BlockBase):
+        """Updates the position and the size of a block"""
+        block_id = id(block)
+        rect = block.rect
+        prev_rect = self._rects.get(block_id)
+        if prev_rect == rect:
+            # only what is drawn inside the block changed
+            self.damage(block)
+            return
+        if prev_rect is not None:
+            self.damage(block)
+        self._rects[block_id] = rect
+        self._blocks.set(block_id, rect)
+        self.damage(block)
+        self.__update_arrows(block_id)
+        for prev_id in self._links_in[block_id]:
+            self.__update_arrows(prev_id)
+
+    def update_links(self, block: BlockBase):
+        """Updates the arrows that start from a block"""
+        block_id = id(block)
+        links = tuple(id(next_block) for next_block in _next_blocks(block) if id(next_block) in self._block_of)
+        for next_id in self._links_out[block_id]:
+            self._links_in[next_id].discard(block_id)
+        for next_id in links:
+            self._links_in[next_id].add(block_id)
+        self._links_out[block_id] = links
+        self.__update_arrows(block_id)
+
+    def __update_arrows(self, block_id: int):
+        links = self._links_out[block_id]
+        if not links:
+            self.__set_arrow_area(block_id, None)
+            return
+        rects = self._rects
+        area = rects[block_id].unionall([rects[next_id] for next_id in links])
+        self.__set_arrow_area(block_id, area.inflate(ARROW_ROUTE_MARGIN * 2, ARROW_ROUTE_MARGIN * 2))
+
+    def __set_arrow_area(self, block_id: int, area: pg.Rect | None):
+        prev_area = self._arrow_areas.pop(block_id, None)
+        if prev_area is not None:
+            self._damage.append(prev_area)
+        if area is None:
+            self._arrows.remove(block_id)
+            return
+        self._arrow_areas[block_id] = area
+        self._arrows.set(block_id, area)
+        self._damage.append(area)
+
+    def damage(self, block: BlockBase):
+        """Marks the area where a block is drawn as changed"""
+        self._damage.append(self._rects[id(block)].inflate(BLOCK_DRAW_MARGIN * 2, BLOCK_DRAW_MARGIN * 2))
+
+    def has_damage(self) -> bool:
+        return bool(self._damage)
+
+    def pop_damage(self) -> list[pg.Rect]:
+        """Returns the areas of the chart that changed since the last call"""
+        damage = self._damage
+        self._damage = []
+        return damage
+
+    def rect(self, block: BlockBase) -> pg.Rect:
+        return self._rects[id(block)]
+
+    def __blocks(self, block_ids: Iterable[int]) -> list[BlockBase]:
+        block_of = self._block_of
+        return [block_of[block_id] for block_id in sorted(block_ids, key=self._order.__getitem__)]
+
+    def blocks_at(self, point) -> list[BlockBase]:
+        """Returns the blocks that contain the point, the block drawn on top is the last"""
+        rects = self._rects
+        block_ids = self._blocks.query(pg.Rect(point, (1, 1)))
+        return self.__blocks(block_id for block_id in block_ids if rects[block_id].collidepoint(point))
+
+    def blocks_in(self, rect: pg.Rect) -> list[BlockBase]:
+        """Returns the blocks that collide with rect"""
+        rects = self._rects
+        block_ids = self._blocks.query(rect)
+        return self.__blocks(block_id for block_id in block_ids if rects[block_id].colliderect(rect))
+
+    def arrows_in(self, rect: pg.Rect) -> list[BlockBase]:
+        """Returns the blocks from which start the arrows that may pass inside rect"""
+        return self.__blocks(self._arrows.query(rect))
+
+
+def _next_blocks(block: BlockBase) -> list[BlockBase]:
+    if isinstance(block, CondBlock):
+        next_blocks = [block.on_true.next_block, block.on_false.next_block]
+    else:
+        next_blocks = [block.next_block]
+    return [next_block for next_block in next_blocks if next_block is not None]
@@ -1,8 +1,17 @@
-from app import App
+import argparse
+from app import App, DEFAULT_FPS
 
 
 def main():
-    app = App()
+    arg_parser = argparse.ArgumentParser(description="Edit and run flowcharts.")
+    arg_parser.add_argument("chart", nargs="?", help="path of the chart to open, it is created when saved")
+    arg_parser.add_argument(
+        "--fps", type=int, default=DEFAULT_FPS,
+        help=f"maximum frames drawn per second while the editor changes (default {DEFAULT_FPS})"
+    )
+    args = arg_parser.parse_args()
+
+    app = App(args.chart, args.fps)
     app.run()
 
 
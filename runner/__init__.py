@@ -1,6 +1,9 @@
 from .lexer import Lexer
-from .parser import Parser, full_compilation
-from .error import ExecutionError
+from .parser import Parser, TextValidator, full_compilation, parse_block
+from .compile_cache import cached_compilation, set_compile_cache_path, save_compile_cache, clear_compile_cache
+from .error import ExecutionError, StopExecution
 from .values import ExeValue
 from .io_interface import Console, TerminalLink
 from .code_runner import Runner, RunnerError
+from .profiler import Profile
+from .builtins import Builtin, register_builtin, get_builtin, builtin_names
@@ -0,0 +1,285 @@
+import math
+import random
+from typing import Callable
+
+from .error import ExecutionError, ExecutionException
+from .values import ExeValueType, raw_type, raise_error
+
+
+class Builtin:
+    """
+    A function that can be called from the blocks. func receives the raw values of the arguments (see box_value) and
+    returns a raw value, raising ExecutionException if an error occurs. The argument at index i must be of type
+    arg_types[i], the last type is used for the arguments after it. max_args is -1 if there is no limit.
+    A pure function always returns the same value with the same arguments and is evaluated when compiling if they are
+    constant.
+    """
+    __slots__ = ("name", "func", "arg_types", "min_args", "max_args", "return_type", "pure")
+
+    def __init__(
+            self,
+            name: str,
+            func: Callable,
+            arg_types: tuple[str, ...],
+            min_args: int,
+            max_args: int,
+            return_type: str,
+            pure: bool
+    ):
+        self.name = name
+        self.func = func
+        self.arg_types = arg_types
+        self.min_args = min_args
+        self.max_args = max_args
+        self.return_type = return_type
+        self.pure = pure
+
+    def arg_type(self, arg_idx: int) -> str:
+        return self.arg_types[min(arg_idx, len(self.arg_types) - 1)]
+
+    def arg_count_error(self, arg_num: int) -> ExecutionError | None:
+        """Returns the error of calling the function with arg_num arguments, if any"""
+        if self.min_args == self.max_args and arg_num != self.min_args:
+            return ExecutionError(
+                "error.name.call_error",
+                "error.msg.wrong_arg_num",
+                arg_num=arg_num,
+                args=self.min_args
+            )
+        elif arg_num < self.min_args:
+            return ExecutionError(
+                "error.name.call_error",
+                "error.msg.too_few_arguments",
+                arg_num=arg_num,
+                min_args=self.min_args
+            )
+        elif arg_num > self.max_args >= 0:
+            return ExecutionError(
+                "error.name.call_error",
+                "error.msg.too_many_arguments",
+                arg_num=arg_num,
+                max_args=self.max_args
+            )
+        return None
+
+    def arg_type_error(self, arg_idx: int, type_received: str) -> ExecutionError:
+        return ExecutionError(
+            "error.name.type_error",
+            "error.msg.expected_arg_type",
+            func_name=self.name,
+            arg_idx=arg_idx + 1,
+            type_expected=self.arg_type(arg_idx),
+            type_received=type_received
+        )
+
+    def call(self, args: list):
+        """Calls the function checking the types of the arguments, their number must be already valid"""
+        for i, arg in enumerate(args):
+            arg_type = raw_type(arg)
+            if arg_type != self.arg_type(i):
+                raise ExecutionException(self.arg_type_error(i, arg_type))
+        return self.func(*args)
+
+
+_builtins: dict[str, Builtin] = {}
+
+
+def get_builtin(name: str) -> Builtin | None:
+    return _builtins.get(name)
+
+
+def builtin_names() -> list[str]:
+    return list(_builtins)
+
+
+def register_builtin(
+        name: str,
+        arg_types: tuple[str, ...] = (ExeValueType.NUMBER,),
+        min_args: int | None = None,
+        max_args: int | None = None,
+        return_type: str = ExeValueType.NUMBER,
+        pure: bool = True
+):
+    """
+    Decorator that makes a function callable from the blocks with the given name, see Builtin. By default the
+    function takes exactly one argument for each of arg_types.
+    """
+    def decorator(func):
+        _builtins[name] = Builtin(
+            name,
+            func,
+            arg_types,
+            len(arg_types) if min_args is None else min_args,
+            len(arg_types) if max_args is None else max_args,
+            return_type,
+            pure
+        )
+        return func
+    return decorator
+
+
+def _undefined_for(func_name: str, value):
+    raise_error("error.name.math_error", "error.msg.undefined_func", func_name=func_name, value=value)
+
+
+def _register_math_func(name: str, func: Callable):
+    """Registers a function of one number that may not be defined for all numbers"""
+    def math_func(x):
+        try:
+            return func(x)
+        except (ArithmeticError, ValueError):
+            _undefined_for(name, x)
+
+    register_builtin(name)(math_func)
+
+
+_NUMBER = ExeValueType.NUMBER
+_STRING = ExeValueType.STRING
+
+for _name, _func in (
+    ("sin", math.sin),
+    ("cos", math.cos),
+    ("tan", math.tan),
+    ("arcsin", math.asin),
+    ("arccos", math.acos),
+    ("arctan", math.atan),
+    ("floor", math.floor),
+    ("ceil", math.ceil),
+    ("exp", math.exp),
+):
+    _register_math_func(_name, _func)
+
+
+@register_builtin("mod", (_NUMBER, _NUMBER))
+def _mod(number, divisor):
+    if divisor == 0:
+        raise_error("error.name.math_error", "error.msg.modulo_by_zero")
+    return number % divisor
+
+
+@register_builtin("round", (_NUMBER, _NUMBER), min_args=1)
+def _round(x, digits=None):
+    try:
+        if digits is None:
+            return round(x)
+        return round(x, int(digits))
+    except (ArithmeticError, ValueError):
+        _undefined_for("round", x)
+
+
+@register_builtin("log", (_NUMBER, _NUMBER), min_args=1)
+def _log(x, base=None):
+    try:
+        if base is None:
+            return math.log10(x)
+        return math.log(x, base)
+    except (ArithmeticError, ValueError):
+        _undefined_for("log", x)
+
+
+@register_builtin("sign")
+def _sign(x):
+    if x > 0:
+        return 1
+    elif x < 0:
+        return -1
+    return 0
+
+
+@register_builtin("sqrt")
+def _sqrt(x):
+    try:
+        result = x**0.5
+    except ArithmeticError:
+        _undefined_for("sqrt", x)
+    if isinstance(result, complex):
+        _undefined_for("sqrt", x)
+    return result
+
+
+@register_builtin("root", (_NUMBER, _NUMBER))
+def _root(x, index):
+    if index == 0:
+        raise_error("error.name.math_error", "error.msg.zero_root_index")
+    try:
+        result = x ** (1 / index)
+    except ArithmeticError:
+        _undefined_for("root", x)
+    if isinstance(result, complex):
+        _undefined_for("root", x)
+    return result
+
+
+@register_builtin("pow", (_NUMBER, _NUMBER))
+def _pow(base, exponent):
+    try:
+        result = base ** exponent
+    except ArithmeticError:
+        _undefined_for("pow", base)
+    if isinstance(result, complex):
+        _undefined_for("pow", base)
+    return result
+
+
+@register_builtin("max", min_args=2, max_args=-1)
+def _max(*values):
+    return max(values)
+
+
+@register_builtin("min", min_args=2, max_args=-1)
+def _min(*values):
+    return min(values)
+
+
+@register_builtin("abs")
+def _abs(x):
+    return abs(x)
+
+
+@register_builtin("hypot", min_args=2, max_args=-1)
+def _hypot(*values):
+    try:
+        return math.hypot(*values)
+    except ArithmeticError:
+        _undefined_for("hypot", values[0])
+
+
+@register_builtin("random", (), pure=False)
+def _random():
+    return random.random()
+
+
+@register_builtin("len", (_STRING,))
+def _len(string):
+    return len(string)
+
+
+@register_builtin("upper", (_STRING,), return_type=_STRING)
+def _upper(string):
+    return string.upper()
+
+
+@register_builtin("lower", (_STRING,), return_type=_STRING)
+def _lower(string):
+    return string.lower()
+
+
+@register_builtin("substr", (_STRING, _NUMBER, _NUMBER), min_args=2, return_type=_STRING)
+def _substr(string, start, length=None):
+    try:
+        start = max(int(start), 0)
+        if length is None:
+            return string[start:]
+        return string[start:start + max(int(length), 0)]
+    except (ArithmeticError, ValueError):
+        _undefined_for("substr", start)
+
+
+@register_builtin("find", (_STRING, _STRING))
+def _find(string, sub_string):
+    return string.find(sub_string)
+
+
+@register_builtin("replace", (_STRING, _STRING, _STRING), return_type=_STRING)
+def _replace(string, old, new):
+    return string.replace(old, new)
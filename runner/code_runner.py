@@ -1,18 +1,48 @@
 import ctypes
 import multiprocessing as mp
 import queue
+import threading
 import time
+from multiprocessing.connection import Connection
+from typing import Callable
 
 from ui_components import BlockBase, EndBlock, CondBlock, StartBlock
 
-from .io_interface import NonBlockingLink
-from .nodes import Node
-from .parser import full_compilation, ExecutionError
-from .values import to_boolean
+from .io_interface import Console, NonBlockingLink, LinkInMessage
+from .nodes import Node, TypeEnv, UNDEFINED, resolve_slots
+from .compile_cache import cached_compilation
+from .parser import ExecutionError
+from .error import StopExecution
+from .vm import VirtualMachine, compile_program
+from .sym_table_snapshot import SymTableSnapshot
+from .profiler import Profile
+from .type_inference import infer_block_types, find_type_error
+
+# minimum time in seconds between two updates of the symbol table sent by the runner
+SYM_TABLE_FLUSH_INTERVAL = 1 / 30
+# number of blocks executed in turbo mode before checking if the execution was paused
+TURBO_BATCH_SIZE = 1000
+# how long in seconds a stopped execution has to send its profile before its process is terminated
+PROFILE_STOP_TIMEOUT = 1.0
+
+
+def _update_sent_values(frame: list, sent_values: list) -> bool:
+    """Returns whether any variable changed since it was last sent and marks all of them as sent"""
+    changed = False
+    for slot, value in enumerate(frame):
+        sent_value = sent_values[slot]
+        if value is sent_value:
+            continue
+        sent_values[slot] = value
+        if sent_value is UNDEFINED or value.__class__ is not sent_value.__class__ or value != sent_value:
+            changed = True
+    return changed
 
 
 class RunnerError(Exception):
-    def __init__(self, name, msg=None):
+    def __init__(self, name, msg=None, block_id=None):
+        # the id of the block that caused the error, if it is known
+        self.block_id = block_id
         if isinstance(name, ExecutionError):
             self.name_ = name.name
             self.msg_ = name.msg
@@ -25,34 +55,61 @@ class RunnerError(Exception):
 
 
 class Runner:
-    def __init__(self, start_block: BlockBase, delay=None):
+    def __init__(
+            self,
+            start_block: BlockBase,
+            delay=None,
+            turbo=False,
+            profile=False,
+            on_state: Callable[[], None] | None = None
+    ):
         self.start_block = start_block
         self.blocks = self.get_blocks()
         self._delay = delay or 0
+        # in turbo mode the delay is ignored and the state is shared with the editor at most every
+        # SYM_TABLE_FLUSH_INTERVAL seconds, unless the execution is paused
+        self.turbo = turbo
+        # when profiling, the Profile of the execution is received once it ends
+        self.profile_enabled = profile
+        self.profile: Profile | None = None
+        # called from another thread each time the execution reports a new state and once it ends
+        self.on_state = on_state
+        self._profile_q = None
         self._delay_value = None
         self._current_block = None
         self._is_paused = None
         self._block_advance_value = None
         self._block_advance = 0
+        self._state_changed = None
+        self._stop_requested = None
         self._error_occurred = None
         self.out_q = mp.Queue()
         self.err_q = mp.Queue()
         self.in_q = None
         self.link_in_msg = None
         self.link_out_msg = None
-        self.sym_table_vars = None
         self.sym_table = None
+        self._sym_table_snapshot: SymTableSnapshot | None = None
+        self._sym_table_seq = -1
         self._process: mp.Process | None = None
+        # waits for the profile of a stopped execution before terminating it
+        self._stop_thread: threading.Thread | None = None
         self.ast_map = {}
 
         for block in self.blocks:
-            ast = full_compilation(block)
+            ast = cached_compilation(block)
             if isinstance(ast, ExecutionError):
-                raise RunnerError(ast)
+                raise RunnerError(ast, block_id=id(block))
             if isinstance(block, CondBlock):
                 self.ast_map[id(block)] = (ast, (id(block.on_true.next_block), id(block.on_false.next_block)))
             else:
                 self.ast_map[id(block)] = (ast, id(block.next_block))
+        self.slots = resolve_slots(ast for ast, _ in self.ast_map.values())
+
+        self.block_types = infer_block_types(id(self.start_block.next_block), self.ast_map)
+        type_error = find_type_error(self.block_types, self.ast_map)
+        if type_error is not None:
+            raise RunnerError(type_error[1], block_id=type_error[0])
 
     @property
     def delay(self):
@@ -86,73 +143,135 @@ class Runner:
     def execute_blocks(
             first_block: int,  # the first block to execute
             ast_map: dict[int, tuple[Node, int | tuple[int, int]]],  # list of blocks with their original ids
+            slots: dict[str, int],  # the slot of each variable in the frame
+            block_types: dict[int, TypeEnv],  # the types of the variables at the start of each block
             delay: mp.Value,  # delay in seconds between blocks
+            turbo: bool,  # whether to run in turbo mode
             current_block: mp.Value,  # set to the id of the block being currently executed
             is_paused: mp.Value,  # set to whether the execution is paused
             block_advance: mp.Value,  # increasing the number by N, advances N blocks
+            state_changed: mp.Condition,  # notified when is_paused or block_advance change
+            stop_requested: mp.Event,  # set when the execution is stopped, state_changed is notified
             error_occurred: mp.Value,  # set to whether an error has occurred
             out_q: mp.Queue,  # queue for stdout messages, populated by the runner
             err_q: mp.Queue,  # queue for stderr messages, populated by the runner
             in_q: mp.Queue,  # queue for stdin messages, populated externally
             link_in_msg: mp.Queue,  # messages to send to the IO link
             link_out_msg: mp.Queue,  # messages sent by the IO link
-            sym_table_vars: mp.Queue,  # queue for symbol table values, populated by the runner
+            snapshot_name: str,  # name of the shared memory of the SymTableSnapshot, written by the runner
+            profile_q: mp.Queue,  # receives the Profile when the execution ends, None to not profile
+            state_conn: Connection,  # a message is sent when the state changes to wake up the editor
     ):
-        io_link = NonBlockingLink(out_q, err_q, in_q, link_in_msg, link_out_msg)
-        current_block.value = first_block
-        curr_block_id = first_block
-        sym_table = {}
-        error_occurred_v = False
+        next_report = 0
+
+        def report_state(force=False):
+            """Tells the editor that the state changed, at most every SYM_TABLE_FLUSH_INTERVAL unless forced"""
+            nonlocal next_report
+            now = time.perf_counter()
+            if force or now >= next_report:
+                state_conn.send_bytes(b"")
+                next_report = now + SYM_TABLE_FLUSH_INTERVAL
+
+        io_link = NonBlockingLink(out_q, err_q, in_q, link_in_msg, link_out_msg, report_state)
+        frame = [UNDEFINED] * len(slots)
         blocks_advanced = 0
+        sent_values = [UNDEFINED] * len(slots)
+        next_flush = 0
+        snapshot = SymTableSnapshot.attach(snapshot_name, len(slots))
+
+        def flush_sym_table():
+            if _update_sent_values(frame, sent_values):
+                snapshot.write([None if value is UNDEFINED else value for value in frame])
+
+        def can_advance():
+            return stop_requested.is_set() or not is_paused.value or block_advance.value != blocks_advanced
+
+        def wait_while_paused():
+            with state_changed:
+                state_changed.wait_for(can_advance)
+
+        def report_error(error):
+            flush_sym_table()
+            current_block.value = vm.current_block
+            err_q.put_nowait((error.name, error.msg, error.fmt_args))
+            error_occurred.value = True
+            report_state(force=True)
+
+        profile = None if profile_q is None else Profile()
+        call_counts = None if profile is None else profile.call_counts
+        # closures cannot be sent to another process, the program is compiled here
+        code = compile_program(first_block, ast_map, slots, block_types, call_counts)
+        vm = VirtualMachine(code, frame, io_link, profile)
+        current_block.value = vm.current_block
+        report_state()
 
-        while curr_block_id in ast_map:
-            ast, next_block = ast_map[curr_block_id]
-            value = ast.evaluate(sym_table, io_link)
-            if value.error():
-                err_q.put_nowait((value.value.name, value.value.msg, value.value.fmt_args))
-                error_occurred.value = True
-                error_occurred_v = True
-                break
-
-            for key, value in sym_table.items():
-                sym_table_vars.put_nowait((key, value.value))
-
-            time.sleep(delay.value)
-            while is_paused.value and block_advance.value == blocks_advanced:
-                pass
-
-            if is_paused.value and block_advance.value > blocks_advanced:
-                blocks_advanced += 1
-            else:
-                blocks_advanced = block_advance.value
-
-            if isinstance(next_block, int):
-                curr_block_id = next_block
-                current_block.value = next_block
-                continue
-            boolean_value = to_boolean(value)
-            if value.error():
-                err_q.put_nowait((value.value.name, value.value.msg))
-                break
-            if boolean_value.value:
-                curr_block_id = next_block[0]
-            else:
-                curr_block_id = next_block[1]
-            current_block.value = curr_block_id
+        try:
+            # the execution stops between the blocks to send the profile and the last state
+            while not vm.finished and not stop_requested.is_set():
+                if turbo and not is_paused.value:
+                    error = vm.run(TURBO_BATCH_SIZE)
+                    if error is not None:
+                        report_error(error)
+                        break
+
+                    now = time.perf_counter()
+                    if now >= next_flush:
+                        flush_sym_table()
+                        current_block.value = vm.current_block
+                        next_flush = now + SYM_TABLE_FLUSH_INTERVAL
+                        report_state()
+                    continue
+
+                error = vm.step()
+                if error is not None:
+                    report_error(error)
+                    break
+
+                # the delay ends early when the execution is stopped
+                stop_requested.wait(delay.value)
+
+                now = time.perf_counter()
+                if now >= next_flush or is_paused.value:
+                    flush_sym_table()
+                    next_flush = now + SYM_TABLE_FLUSH_INTERVAL
+                if is_paused.value:
+                    # the editor must show the state before the execution waits
+                    report_state(force=True)
+
+                wait_while_paused()
+
+                if is_paused.value and block_advance.value > blocks_advanced:
+                    blocks_advanced += 1
+                else:
+                    blocks_advanced = block_advance.value
+
+                current_block.value = vm.current_block
+                report_state()
+        except StopExecution:
+            # the execution was stopped while waiting for input
+            pass
 
-        if error_occurred_v:
-            while True:
-                pass
+        flush_sym_table()
+        current_block.value = vm.current_block
+        if profile is not None:
+            profile_q.put(profile)
+        report_state(force=True)
+        if stop_requested.is_set():
+            return
+        if error_occurred.value:
+            # keep the process alive to show the error until the execution is stopped
+            stop_requested.wait()
         else:
-            while is_paused.value and block_advance.value == blocks_advanced:
-                pass
+            wait_while_paused()
 
     def get_blocks(self):
         blocks_checked = []
+        checked_ids = set()
         blocks_to_check = [self.start_block]
         for block in blocks_to_check:
-            if isinstance(block, EndBlock) or block in blocks_checked:
+            if isinstance(block, EndBlock) or id(block) in checked_ids:
                 continue
+            checked_ids.add(id(block))
             if isinstance(block, CondBlock):
                 if block.on_true.next_block is None or block.on_false.next_block is None:
                     raise RunnerError("error.name.comp_error", "error.msg.incomplete_tree")
@@ -167,6 +286,18 @@ class Runner:
         blocks_checked = [b for b in blocks_checked if not isinstance(b, EndBlock) and not isinstance(b, StartBlock)]
         return blocks_checked
 
+    def run(self, console: Console) -> ExecutionError | None:
+        """
+        Executes the flowchart to the end in the current process, without any delay, using console for input and
+        output. Returns the error that stopped the execution, if any.
+        """
+        frame = [UNDEFINED] * len(self.slots)
+        self.profile = Profile() if self.profile_enabled else None
+        call_counts = None if self.profile is None else self.profile.call_counts
+        code = compile_program(id(self.start_block.next_block), self.ast_map, self.slots, self.block_types, call_counts)
+        vm = VirtualMachine(code, frame, console, self.profile)
+        return vm.run()
+
     def start(self, start_paused=False):
         if self._process is not None:
             return
@@ -177,35 +308,79 @@ class Runner:
         self._error_occurred = mp.Value(ctypes.c_bool, False)
         self._block_advance_value = mp.Value(ctypes.c_ulonglong, 0)
         self._block_advance = 0
+        self._state_changed = mp.Condition()
+        self._stop_requested = mp.Event()
         self.in_q = mp.Queue()
         self.link_in_msg = mp.Queue()
         self.link_out_msg = mp.Queue()
-        self.sym_table_vars = mp.Queue()
         self.sym_table = {}
+        self._sym_table_snapshot = SymTableSnapshot.create(len(self.slots))
+        self._sym_table_seq = -1
+        self._profile_q = mp.Queue() if self.profile_enabled else None
+        self.profile = None
+        state_reader, state_writer = mp.Pipe(duplex=False)
 
         self._process = mp.Process(
             target=self.execute_blocks,
             args=(
                 id(self.start_block.next_block),
                 self.ast_map,
+                self.slots,
+                self.block_types,
                 self._delay_value,
+                self.turbo,
                 self._current_block,
                 self._is_paused,
                 self._block_advance_value,
+                self._state_changed,
+                self._stop_requested,
                 self._error_occurred,
                 self.out_q,
                 self.err_q,
                 self.in_q,
                 self.link_in_msg,
                 self.link_out_msg,
-                self.sym_table_vars
+                self._sym_table_snapshot.name,
+                self._profile_q,
+                state_writer
             )
         )
 
         self._process.start()
+        # only the process writes to the pipe, the reader gets EOF once it ends
+        state_writer.close()
+        threading.Thread(target=self.__watch_state, args=(state_reader,), name="runner-state", daemon=True).start()
+
+    def __watch_state(self, state_reader: Connection):
+        with state_reader:
+            while True:
+                try:
+                    state_reader.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                if self.on_state is not None:
+                    self.on_state()
+        if self.on_state is not None:
+            self.on_state()
 
     def stop(self):
-        if self._process.is_alive():
+        self.__receive_profile()
+        if self._stop_requested is not None:
+            with self._state_changed:
+                self._stop_requested.set()
+                self._state_changed.notify_all()
+            # wakes up the execution if it is waiting for input
+            self.link_in_msg.put((LinkInMessage.STOP_EXECUTION,))
+        if self._profile_q is not None and self.profile is None and self._process.is_alive():
+            # the profile of an execution that is stopped is still shown, it is received without blocking the caller
+            self._stop_thread = threading.Thread(
+                target=self.__receive_last_profile,
+                args=(self._process, self._profile_q),
+                name="runner-stop",
+                daemon=True
+            )
+            self._stop_thread.start()
+        elif self._process.is_alive() and not self.profile_pending:
             self._process.terminate()
 
         self._delay_value = None
@@ -213,24 +388,58 @@ class Runner:
         self._is_paused = None
         self._block_advance_value = None
         self._block_advance = 0
+        self._state_changed = None
+        self._stop_requested = None
         self.in_q = None
         self.link_in_msg = None
         self.link_out_msg = None
-        self.sym_table_vars = None
         self.sym_table = None
+        self._profile_q = None
+        if self._sym_table_snapshot is not None:
+            self._sym_table_snapshot.close()
+            self._sym_table_snapshot = None
+
+    @property
+    def profile_pending(self) -> bool:
+        """Whether the execution was stopped and its profile may still be received"""
+        return self._stop_thread is not None and self._stop_thread.is_alive()
+
+    def wait_stopped(self):
+        """Waits until the profile of a stopped execution is received and the execution ends"""
+        if self._stop_thread is not None:
+            self._stop_thread.join()
+
+    def __receive_last_profile(self, process: mp.Process, profile_q: mp.Queue):
+        try:
+            self.profile = profile_q.get(timeout=PROFILE_STOP_TIMEOUT)
+        except queue.Empty:
+            pass
+        if process.is_alive():
+            process.terminate()
+        if self.on_state is not None:
+            self.on_state()
 
     def update_state(self):
-        if self._process is None:
+        if self._process is None or self.sym_table is None:
             return
-        elif not self._process.is_alive():
+        is_alive = self._process.is_alive()
+
+        snapshot = self._sym_table_snapshot.read(self._sym_table_seq)
+        if snapshot is not None:
+            self._sym_table_seq, values = snapshot
+            for name, value in zip(self.slots, values):
+                if value is not None:
+                    self.sym_table[name] = value
+
+        self.__receive_profile()
+        if not is_alive:
             self.stop()
-            return
 
+    def __receive_profile(self):
+        if self._profile_q is None or self.profile is not None:
+            return
         try:
-            # update at most 50 variables per frame
-            for _ in range(50):
-                key, value = self.sym_table_vars.get_nowait()
-                self.sym_table[key] = value
+            self.profile = self._profile_q.get_nowait()
         except queue.Empty:
             pass
 
@@ -241,18 +450,24 @@ class Runner:
         if self.is_paused:
             return
 
-        self._is_paused.value = True
+        with self._state_changed:
+            self._is_paused.value = True
+            self._state_changed.notify_all()
 
     def resume(self):
         if not self.is_paused:
             return
-        self._is_paused.value = False
+        with self._state_changed:
+            self._is_paused.value = False
+            self._state_changed.notify_all()
 
     def advance(self, block_count=1):
         if not self.is_running() or not self.is_paused:
             return
         self._block_advance += block_count
-        self._block_advance_value.value = self._block_advance
+        with self._state_changed:
+            self._block_advance_value.value = self._block_advance
+            self._state_changed.notify_all()
 
     def get_queued_messages(self):
         messages = []
@@ -0,0 +1,139 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from ui_components import BlockBase, IOBlock
+
+from .builtins import builtin_names, get_builtin
+from .error import ExecutionError
+from .nodes import Node
+from .parser import full_compilation
+
+# increase when a change to the lexer, the parser or the nodes makes the cached trees out of date
+COMPILER_VERSION = 9
+# maximum number of compiled blocks kept in the cache, the least recently used ones are discarded first
+COMPILE_CACHE_SIZE = 4096
+
+_cache: OrderedDict[tuple, Node | ExecutionError] = OrderedDict()
+_cache_path: str | None = None
+_cache_loaded = False
+_cache_changed = False
+# the builtins the trees in the cache were compiled with, see _builtins_signature
+_cache_builtins: tuple | None = None
+# the cache is used both by the editor and by its compilation thread
+_cache_lock = threading.Lock()
+
+
+def set_compile_cache_path(path: str | None):
+    """Sets the file where the cache is kept between sessions, None keeps it only in memory"""
+    global _cache_path, _cache_loaded
+    _cache_path = None if path is None else os.path.abspath(path)
+    _cache_loaded = False
+
+
+def cached_compilation(block: BlockBase, text: str | None = None) -> Node | ExecutionError:
+    """
+    Same as full_compilation but blocks of the same type with the same content are compiled only once.
+    The trees are shared between blocks and must not be modified.
+    """
+    if text is None:
+        text = block.content.text
+    key = _cache_key(block, text)
+    with _cache_lock:
+        if not _cache_loaded:
+            _load_cache()
+        _check_builtins()
+        ast = _cache.get(key, None)
+        if ast is not None:
+            _cache.move_to_end(key)
+            return ast
+
+    global _cache_changed
+    ast = full_compilation(block, text)
+    with _cache_lock:
+        _cache[key] = ast
+        _cache_changed = True
+        if len(_cache) > COMPILE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ast
+
+
+def save_compile_cache():
+    """Writes the cache to the file set with set_compile_cache_path, if it changed since it was loaded"""
+    global _cache_changed
+    if _cache_path is None or not _cache_changed:
+        return
+    with _cache_lock:
+        items = list(_cache.items())
+        builtins = _cache_builtins
+    tmp_path = _cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(_cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(((COMPILER_VERSION, builtins), items), f, pickle.HIGHEST_PROTOCOL)
+        # the old cache is replaced only when the new one is complete
+        os.replace(tmp_path, _cache_path)
+    except (OSError, pickle.PicklingError):
+        return
+    _cache_changed = False
+
+
+def clear_compile_cache():
+    global _cache_changed
+    with _cache_lock:
+        _cache.clear()
+        _cache_changed = True
+
+
+def _cache_key(block: BlockBase, text: str) -> tuple:
+    if isinstance(block, IOBlock):
+        return block.__class__.__name__, block.is_input, text, COMPILER_VERSION
+    return block.__class__.__name__, None, text, COMPILER_VERSION
+
+
+def _builtins_signature() -> tuple:
+    """
+    What the compilation depends on of the registered builtins: calls to unknown functions or with the wrong number
+    of arguments are errors and pure functions with constant arguments are evaluated
+    """
+    signature = []
+    for name in sorted(builtin_names()):
+        builtin = get_builtin(name)
+        signature.append((name, builtin.arg_types, builtin.min_args, builtin.max_args, builtin.return_type, builtin.pure))
+    return tuple(signature)
+
+
+def _check_builtins():
+    """Discards the trees compiled before a builtin was registered"""
+    global _cache_builtins
+    builtins = _builtins_signature()
+    if builtins != _cache_builtins:
+        _cache.clear()
+        _cache_builtins = builtins
+
+
+def _load_cache():
+    global _cache_loaded, _cache_builtins
+    _cache_loaded = True
+    if _cache_path is None:
+        return
+    try:
+        with open(_cache_path, "rb") as f:
+            version, items = pickle.load(f)
+    except Exception:
+        # a missing or damaged cache is just empty, unpickling a truncated or foreign file can raise almost anything
+        return
+    builtins = _builtins_signature()
+    if version != (COMPILER_VERSION, builtins):
+        return
+    # the trees on disk are compiled with the same builtins and are not discarded by _check_builtins
+    _cache_builtins = builtins
+
+    # the blocks compiled in this session are more recent than the ones on disk
+    for key, ast in reversed(items):
+        if key not in _cache:
+            _cache[key] = ast
+            _cache.move_to_end(key, last=False)
+    while len(_cache) > COMPILE_CACHE_SIZE:
+        _cache.popitem(last=False)
@@ -1,3 +1,4 @@
+from __future__ import annotations
 from language_manager import Language
 
 
@@ -6,12 +7,19 @@ class ExecutionError:
         self.name = name
         self.msg = msg
         self.fmt_args = fmt_args
+        # the start and end offsets in the source of the text that caused the error, if known
+        self.span: tuple[int, int] | None = None
+
+    def at(self, start: int, end: int) -> ExecutionError:
+        """Sets the span of the error and returns it"""
+        self.span = (start, end)
+        return self
 
     def format(self, language: Language):
         return language[self.name] + ": " + language[self.msg].format(**self.fmt_args)
 
     def __str__(self):
-        return f"ExecutionError(name={self.name!r}, msg={self.msg!r}, fmt_args={self.fmt_args})"
+        return f"ExecutionError(name={self.name!r}, msg={self.msg!r}, fmt_args={self.fmt_args}, span={self.span})"
 
     def __repr__(self):
         return str(self)
@@ -19,3 +27,10 @@ class ExecutionError:
 
 class StopExecution(Exception):
     pass
+
+
+class ExecutionException(Exception):
+    """Raised by the compiled nodes when an error occurs, in place of returning an ExeError"""
+    def __init__(self, error: ExecutionError):
+        super().__init__(str(error))
+        self.error = error
@@ -3,8 +3,12 @@ import sys
 import multiprocessing as mp
 from enum import Enum, auto
 import queue
+from typing import Callable
 from .error import StopExecution
 
+# how often in seconds a NonBlockingLink checks for messages while waiting for input
+STDIN_POLL_INTERVAL = 0.1
+
 
 class Console(ABC):
     @abstractmethod
@@ -32,7 +36,11 @@ class TerminalLink(Console):
         print(string, file=sys.stderr, flush=True)
 
     def stdin_read(self) -> str:
-        return input("> ")
+        try:
+            return input("> ")
+        except EOFError:
+            # stdin was closed or all of it was already read
+            raise StopExecution()
 
     def stdin_hint(self, string: str):
         print(string, end=" ")
@@ -47,18 +55,32 @@ class LinkOutMessage(Enum):
 
 
 class NonBlockingLink(Console):
-    def __init__(self, out_q: mp.Queue, err_q: mp.Queue, in_q: mp.Queue, in_msg_q: mp.Queue, out_msg_q: mp.Queue):
+    def __init__(
+            self,
+            out_q: mp.Queue,
+            err_q: mp.Queue,
+            in_q: mp.Queue,
+            in_msg_q: mp.Queue,
+            out_msg_q: mp.Queue,
+            on_output: Callable[..., None] | None = None
+    ):
         self.out_q = out_q
         self.err_q = err_q
         self.in_q = in_q
         self.in_msg_q = in_msg_q
         self.out_msg_q = out_msg_q
+        # called after a message is sent to the other side, with force=True before waiting for input
+        self.on_output = on_output
 
     def stdout_write(self, string: str):
         self.out_q.put(string)
+        if self.on_output is not None:
+            self.on_output()
 
     def stderr_write(self, string: str):
         self.err_q.put(string)
+        if self.on_output is not None:
+            self.on_output()
 
     def _handle_message(self):
         try:
@@ -71,11 +93,11 @@ class NonBlockingLink(Console):
     def stdin_read(self) -> str:
         while True:
             try:
-                value = self.in_q.get_nowait()
-                break
+                return self.in_q.get(timeout=STDIN_POLL_INTERVAL)
             except queue.Empty:
                 self._handle_message()
-        return value
 
     def stdin_hint(self, string: str):
         self.out_msg_q.put((LinkOutMessage.SET_IN_HINT, string))
+        if self.on_output is not None:
+            self.on_output(force=True)
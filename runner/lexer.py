@@ -1,12 +1,16 @@
 from .tokens import Token, TokenType
 from .error import ExecutionError
-from string import digits, ascii_letters
+from string import ascii_letters
 import math
+import re
 
 KEYWORDS = ("read", "as", "and", "or", "not")
 TYPE_NAMES = ("Number", "String", "Boolean")
 CONSTANTS = ("true", "false", "_pi", "_e")
 
+# maximum number of source texts whose tokens are kept, the cache is emptied when it is full
+TOKEN_CACHE_SIZE = 1024
+
 char_to_tok_type = {
     "+": TokenType.PLUS,
     "-": TokenType.MINUS,
@@ -19,6 +23,32 @@ char_to_tok_type = {
     ",": TokenType.COMMA
 }
 
+_symbol_tok_types = {
+    **char_to_tok_type,
+    "=": TokenType.EQUALS,
+    "==": TokenType.DOUB_EQ,
+    "!=": TokenType.BANG_EQ,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GRT_EQ,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQ
+}
+
+_IDENT_START = frozenset(ascii_letters + "_")
+
+# the alternatives are tried in order, a string only matches its opening quote and is read by __make_str
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>[0-9]+(?:\.[0-9]*)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<symbol>[=!<>]=|[-+*/%^(),=<>])
+  | (?P<string>")
+""", re.VERBOSE)
+_IDENT_RE = re.compile(r"[A-Za-z0-9_]*")
+_STR_CONTENT_RE = re.compile(r'[^"$]*')
+
+_token_cache: dict[str, list[Token] | ExecutionError] = {}
+
 
 class Lexer:
     def __init__(self, code):
@@ -37,58 +67,110 @@ class Lexer:
         self.idx += 1
 
     def tokenize(self) -> list[Token] | ExecutionError:
-        tokens = []
+        """The same list is returned for the same code, it must not be modified"""
+        tokens = _token_cache.get(self.code)
+        if tokens is not None:
+            self.idx = len(self.code)
+            return tokens
 
-        while not self.finished:
-            if self.ch.isspace():
-                self.advance()
+        self.idx = 0
+        return self.__cache(self.__scan([]))
+
+    def retokenize(self, old_tokens: list[Token] | ExecutionError, edit_range: tuple[int, int, int]) \
+            -> list[Token] | ExecutionError:
+        """
+        Same as tokenize but reuses the tokens of the code before an edit, only the edited part is scanned again.
+        edit_range is (start, old_end, new_end): the characters from start to old_end in the old code were replaced
+        by the ones from start to new_end in the code of the lexer.
+        """
+        tokens = _token_cache.get(self.code)
+        if tokens is not None:
+            self.idx = len(self.code)
+            return tokens
+        if isinstance(old_tokens, ExecutionError):
+            self.idx = 0
+            return self.__cache(self.__scan([]))
+
+        edit_start, old_end, new_end = edit_range
+        # a token is scanned looking at most at the character after it, the ones that end before the edit are kept
+        kept = 0
+        while kept < len(old_tokens) and old_tokens[kept].end < edit_start:
+            kept += 1
+        self.idx = old_tokens[kept - 1].end if kept != 0 else 0
+        return self.__cache(self.__scan(old_tokens[:kept], old_tokens, kept, new_end, new_end - old_end))
+
+    def __cache(self, tokens: list[Token] | ExecutionError) -> list[Token] | ExecutionError:
+        if len(_token_cache) >= TOKEN_CACHE_SIZE:
+            _token_cache.clear()
+        _token_cache[self.code] = tokens
+        return tokens
+
+    def __scan(self, tokens: list[Token], old_tokens: list[Token] = (), old_idx: int = 0, edit_end: int = 0,
+               offset: int = 0) -> list[Token] | ExecutionError:
+        """
+        Scans the code from self.idx adding the tokens to the list. When a token would start after edit_end where one
+        of old_tokens started, moved by offset, the rest of old_tokens is used instead.
+        """
+        code = self.code
+        match_token = _TOKEN_RE.match
+
+        while self.idx < len(code):
+            match = match_token(code, self.idx)
+            if match is None:
+                return self.__unexpected_char()
+
+            kind = match.lastgroup
+            if kind == "space":
+                self.idx = match.end()
                 continue
 
-            if self.ch in digits:
-                token = self.__make_num()
-            elif self.ch in ascii_letters + "_":
-                token = self.__make_ident()
-            elif self.ch == '"':
-                token = self.__make_str()
+            start = self.idx
+            if start >= edit_end and old_idx < len(old_tokens):
+                # the code after edit_end is the same as before the edit, once a token starts at the same place the
+                # following ones are the same as well
+                while old_idx < len(old_tokens) and old_tokens[old_idx].start + offset < start:
+                    old_idx += 1
+                if old_idx < len(old_tokens) and old_tokens[old_idx].start + offset == start:
+                    tokens.extend(tok.shifted(offset) for tok in old_tokens[old_idx:])
+                    self.idx = len(code)
+                    return tokens
+
+            if kind == "number":
+                token = self.__make_num(match)
+            elif kind == "ident":
+                self.idx = match.end()
+                token = self.__ident_token(match.group())
+            elif kind == "symbol":
+                self.idx = match.end()
+                token = Token(_symbol_tok_types[match.group()])
             else:
-                token = self.__make_sym()
+                token = self.__make_str()
 
             if isinstance(token, ExecutionError):
                 return token
+            token.start = start
+            token.end = self.idx
             tokens.append(token)
 
         return tokens
 
-    def __make_num(self):
-        num = self.ch
-        self.advance()
-        while self.ch in digits:
-            num += self.ch
-            self.advance()
-
-        if self.ch in ascii_letters + "_":
-            return ExecutionError("error.name.syntax_error", "error.msg.ident_after_num")
+    def __make_num(self, match: re.Match):
+        num = match.group()
+        start = self.idx
+        self.idx = match.end()
 
-        if not self.ch == ".":
+        if "." not in num:
+            if self.ch in _IDENT_START:
+                ident_end = _IDENT_RE.match(self.code, self.idx).end()
+                return ExecutionError("error.name.syntax_error", "error.msg.ident_after_num").at(start, ident_end)
             return Token(TokenType.NUMBER, int(num))
 
-        num += "."
-        self.advance()
-        if self.ch not in digits:
-            return ExecutionError("error.name.syntax_error", "error.msg.invalid_num_literal")
-        num += self.ch
-        self.advance()
-        while self.ch in digits:
-            num += self.ch
-            self.advance()
+        if num[-1] == ".":
+            return ExecutionError("error.name.syntax_error", "error.msg.invalid_num_literal").at(start, self.idx)
         return Token(TokenType.NUMBER, float(num))
 
-    def __make_ident(self):
-        ident = ""
-        while self.ch in digits + ascii_letters + "_":
-            ident += self.ch
-            self.advance()
-
+    @staticmethod
+    def __ident_token(ident: str) -> Token:
         if ident == "true":
             return Token(TokenType.BOOLEAN, True)
         elif ident == "false":
@@ -105,29 +187,32 @@ class Lexer:
         return Token(TokenType.IDENT, ident)
 
     def __make_str(self):
+        code = self.code
         fmt_string = []
         str_content = ""
+        start = self.idx
         self.advance()
-        while self.ch != '"':
+        while True:
+            match = _STR_CONTENT_RE.match(code, self.idx)
+            str_content += match.group()
+            self.idx = match.end()
             if self.finished:
-                return ExecutionError("error.name.syntax_error", "error.msg.open_string")
+                return ExecutionError("error.name.syntax_error", "error.msg.open_string").at(start, self.idx)
+            if self.ch == '"':
+                break
 
-            if self.ch != "$":
-                str_content += self.ch
-                self.advance()
-                continue
+            # the character is a $
             self.advance()
             if self.ch in '"$':
                 str_content += self.ch
                 self.advance()
-                continue
-            elif self.ch in ascii_letters + "_":
-                ident_tok = self.__make_ident()
+            elif self.ch in _IDENT_START:
+                match = _IDENT_RE.match(code, self.idx)
+                self.idx = match.end()
                 fmt_string.append(str_content)
                 str_content = ""
-                fmt_string.append(ident_tok.value)
-            else:
-                str_content += ""
+                fmt_string.append(match.group())
+            # a $ followed by any other character is ignored
 
         self.advance()
         if len(fmt_string) != 0:
@@ -135,34 +220,9 @@ class Lexer:
             return Token(TokenType.FORMAT_STRING, fmt_string)
         return Token(TokenType.STRING, str_content)
 
-    def __make_sym(self):
-        if self.ch in char_to_tok_type:
-            tok = Token(char_to_tok_type[self.ch])
-            self.advance()
-            return tok
-
-        if self.ch == "=":
-            self.advance()
-            if self.ch == "=":
-                self.advance()
-                return Token(TokenType.DOUB_EQ)
-            return Token(TokenType.EQUALS)
-        elif self.ch == ">":
-            self.advance()
-            if self.ch == "=":
-                self.advance()
-                return Token(TokenType.GRT_EQ)
-            return Token(TokenType.GREATER)
-        elif self.ch == "<":
-            self.advance()
-            if self.ch == "=":
-                self.advance()
-                return Token(TokenType.LESS_EQ)
-            return Token(TokenType.LESS)
-        elif self.ch == "!":
-            self.advance()
-            if self.ch != "=":
-                return ExecutionError("error.name.syntax_error", "error.msg.unexpected_char", char=self.ch)
+    def __unexpected_char(self):
+        start = self.idx
+        if self.ch == "!":
             self.advance()
-            return Token(TokenType.BANG_EQ)
-        return ExecutionError("error.name.syntax_error", "error.msg.unexpected_char", char=self.ch)
+        error = ExecutionError("error.name.syntax_error", "error.msg.unexpected_char", char=self.ch)
+        return error.at(start, min(self.idx + 1, len(self.code)))
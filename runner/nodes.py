@@ -1,9 +1,54 @@
 from __future__ import annotations
+import math
+import operator
+from contextlib import contextmanager
 from enum import auto
+from typing import Callable, Iterable
 from .values import *
+from .builtins import Builtin, get_builtin
 from .io_interface import Console
 from enum import Enum
 
+# A node compiled into a closure, it is called with the frame holding the variables and the console. It returns the
+# raw value of the node (see box_value) and raises ExecutionException if an error occurs
+CompiledNode = Callable[[list, Console], object]
+
+
+class _Undefined:
+    def __repr__(self):
+        return "UNDEFINED"
+
+
+# Value of the slots in a frame that belong to variables not yet defined
+UNDEFINED = _Undefined()
+
+# The types of the variables known at compile time are dictionaries that map the name of each variable to the set of
+# the types it can have, a variable that may not be defined also has UNDEFINED_TYPE and one that is never defined is
+# not in the dictionary
+TypeEnv = dict[str, frozenset[str]]
+UNDEFINED_TYPE = "<undefined>"
+UNDEFINED_TYPES = frozenset((UNDEFINED_TYPE,))
+NUMBER_TYPES = frozenset((ExeValueType.NUMBER,))
+STRING_TYPES = frozenset((ExeValueType.STRING,))
+BOOLEAN_TYPES = frozenset((ExeValueType.BOOLEAN,))
+ANY_TYPES = NUMBER_TYPES | STRING_TYPES | BOOLEAN_TYPES
+
+
+# the calls made to each builtin function by the nodes compiled while it is set, see counting_calls
+_call_counts: dict[str, int] | None = None
+
+
+@contextmanager
+def counting_calls(call_counts: dict[str, int]):
+    """The function calls compiled inside the with statement count how many times each function is called"""
+    global _call_counts
+    prev_call_counts = _call_counts
+    _call_counts = call_counts
+    try:
+        yield
+    finally:
+        _call_counts = prev_call_counts
+
 
 class NodeType(Enum):
     VALUE = auto()
@@ -42,7 +87,84 @@ class UniOp(Enum):
     NOT = auto()
 
 
+_bin_op_funcs = {
+    BinOp.ADD: add_val,
+    BinOp.SUB: sub_val,
+    BinOp.MUL: mul_val,
+    BinOp.DIV: div_val,
+    BinOp.MOD: mod_val,
+    BinOp.POW: pow_val,
+    BinOp.EQ: eq_val,
+    BinOp.NE: ne_val,
+    BinOp.GT: gt_val,
+    BinOp.LT: lt_val,
+    BinOp.GE: ge_val,
+    BinOp.LE: le_val
+}
+
+_bin_op_symbols = {
+    BinOp.ADD: "+",
+    BinOp.SUB: "-",
+    BinOp.MUL: "*",
+    BinOp.DIV: "/",
+    BinOp.MOD: "%",
+    BinOp.POW: "^",
+    BinOp.EQ: "==",
+    BinOp.NE: "==",
+    BinOp.GT: ">",
+    BinOp.LT: "<",
+    BinOp.GE: ">=",
+    BinOp.LE: "<="
+}
+
+# the operators used by the compiled nodes, they work with raw values
+_raw_bin_op_funcs = {
+    BinOp.ADD: add_raw,
+    BinOp.SUB: sub_raw,
+    BinOp.MUL: mul_raw,
+    BinOp.DIV: div_raw,
+    BinOp.MOD: mod_raw,
+    BinOp.POW: pow_raw,
+    BinOp.EQ: eq_raw,
+    BinOp.NE: ne_raw,
+    BinOp.GT: gt_raw,
+    BinOp.LT: lt_raw,
+    BinOp.GE: ge_raw,
+    BinOp.LE: le_raw
+}
+
+# operators that cannot fail when both operands have the same type, see BinNode.compile
+_typed_bin_op_funcs = {
+    (ExeValueType.NUMBER, BinOp.ADD): operator.add,
+    (ExeValueType.NUMBER, BinOp.SUB): operator.sub,
+    (ExeValueType.NUMBER, BinOp.MUL): operator.mul,
+    (ExeValueType.STRING, BinOp.ADD): operator.add,
+}
+for _type in (ExeValueType.NUMBER, ExeValueType.STRING):
+    _typed_bin_op_funcs[(_type, BinOp.GT)] = operator.gt
+    _typed_bin_op_funcs[(_type, BinOp.LT)] = operator.lt
+    _typed_bin_op_funcs[(_type, BinOp.GE)] = operator.ge
+    _typed_bin_op_funcs[(_type, BinOp.LE)] = operator.le
+for _type in (ExeValueType.NUMBER, ExeValueType.STRING, ExeValueType.BOOLEAN):
+    _typed_bin_op_funcs[(_type, BinOp.EQ)] = operator.eq
+    _typed_bin_op_funcs[(_type, BinOp.NE)] = operator.ne
+
+_uni_op_funcs = {
+    UniOp.NOT: not_val,
+    UniOp.NEG: neg_val,
+    UniOp.POS: pos_val
+}
+
+_raw_uni_op_funcs = {
+    UniOp.NOT: not_raw,
+    UniOp.NEG: neg_raw,
+    UniOp.POS: pos_raw
+}
+
 class Node(ABC):
+    # the start and end offsets of the text of the node in the content of the block, set by the parser
+    span: tuple[int, int] | None = None
+
     def __init__(self, type_):
         self.type = type_
 
@@ -50,6 +172,46 @@ class Node(ABC):
     def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
         pass
 
+    @abstractmethod
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        """
+        Returns a closure that behaves like evaluate but works with raw values and
+        raises errors. Operators and functions are resolved here, once, instead of
+        on every call. Variables are stored in a frame (a list) at the index given
+        by slots, see resolve_slots.
+        If types are given, the checks they make unnecessary are left out.
+        """
+        pass
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        """Returns the types the node can evaluate to, without counting errors"""
+        return ANY_TYPES
+
+    def infer_types(self, types: TypeEnv) -> TypeEnv:
+        """Returns the types of the variables after the node is executed"""
+        return types
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        """Returns the error that the node always causes with variables of these types, if any"""
+        return None
+
+    def resolve(self, slots: dict[str, int]) -> None:
+        """Adds the names of the variables used by the node to slots"""
+        pass
+
+    def fold(self) -> Node:
+        """
+        Returns an equivalent node where the constant sub-expressions are already evaluated, the node itself is not
+        modified. Expressions that result in an error are left as they are, to report it when they are executed.
+        """
+        node = self._fold()
+        if node.span is None:
+            node.span = self.span
+        return node
+
+    def _fold(self) -> Node:
+        return self
+
     @abstractmethod
     def __str__(self):
         pass
@@ -66,6 +228,16 @@ class ValueNode(Node):
     def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
         return self.value
 
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        return frozenset((self.value.type,))
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        value = self.value.value
+
+        def value_node(frame, console):
+            return value
+        return value_node
+
     def __str__(self):
         return f"ValueNode(value={self.value})"
 
@@ -82,19 +254,7 @@ class BinNode(Node):
         if left_val.error():
             return left_val
 
-        if self.op == BinOp.ADD:
-            return add_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.SUB:
-            return sub_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.MUL:
-            return mul_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.DIV:
-            return div_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.MOD:
-            return mod_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.POW:
-            return pow_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.L_AND:
+        if self.op == BinOp.L_AND:
             left_val = to_boolean(left_val)
             if left_val.error() or not left_val.value:
                 return left_val
@@ -104,20 +264,108 @@ class BinNode(Node):
             if left_val.error() or left_val.value:
                 return left_val
             return to_boolean(self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.EQ:
-            return eq_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.NE:
-            return ne_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.GT:
-            return gt_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.LT:
-            return gt_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.GE:
-            return gt_val(left_val, self.right_node.evaluate(sym_table, console))
-        elif self.op == BinOp.LE:
-            return gt_val(left_val, self.right_node.evaluate(sym_table, console))
-        else:
+
+        func = _bin_op_funcs.get(self.op)
+        if func is None:
             raise RuntimeError(f"Unknown BinOp {self.op.name}")
+        return func(left_val, self.right_node.evaluate(sym_table, console))
+
+    def resolve(self, slots: dict[str, int]) -> None:
+        self.left_node.resolve(slots)
+        self.right_node.resolve(slots)
+
+    def _fold(self) -> Node:
+        left = self.left_node.fold()
+        right = self.right_node.fold()
+        node = BinNode(left, right, self.op)
+
+        if isinstance(left, ValueNode):
+            if self.op == BinOp.L_AND or self.op == BinOp.L_OR:
+                left_val = to_boolean(left.value)
+                if left_val.error():
+                    return node
+                # true or x, false and x
+                if left_val.value == (self.op == BinOp.L_OR):
+                    return ValueNode(left_val)
+                return CastNode(right, ExeValueType.BOOLEAN).fold()
+            if isinstance(right, ValueNode) and not _is_large_pow(self.op, left.value, right.value):
+                return _evaluate_constant(node)
+
+        # the identities hold only for numbers, x * 1 with a string is still a type error
+        if self.op == BinOp.MUL:
+            if _is_int_value(right, 1) and _is_number(left):
+                return left
+            if _is_int_value(left, 1) and _is_number(right):
+                return right
+        elif self.op == BinOp.SUB and _is_int_value(right, 0) and _is_number(left):
+            return left
+        elif self.op == BinOp.POW and _is_int_value(right, 1) and _is_number(left):
+            return left
+        return node
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        left_types = self.left_node.value_types(types)
+        right_types = self.right_node.value_types(types)
+        result_types = set()
+        for left_type in left_types:
+            for right_type in right_types:
+                result_types.add(_bin_op_type(self.op, left_type, right_type))
+        result_types.discard(None)
+        return frozenset(result_types)
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        error = self.left_node.type_error(types)
+        if error is not None:
+            return error
+        # the right operand of and/or is not always evaluated
+        if self.op == BinOp.L_AND or self.op == BinOp.L_OR:
+            return None
+        error = self.right_node.type_error(types)
+        if error is not None:
+            return error
+
+        left_types = self.left_node.value_types(types)
+        right_types = self.right_node.value_types(types)
+        if len(left_types) != 1 or len(right_types) != 1:
+            return None
+        left_type, = left_types
+        right_type, = right_types
+        if _bin_op_type(self.op, left_type, right_type) is not None:
+            return None
+        return ExecutionError(
+            "error.name.type_error",
+            "error.msg.invalid_op_types",
+            left_type=left_type,
+            right_type=right_type,
+            operand=_bin_op_symbols[self.op]
+        )
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        left = self.left_node.compile(slots, types)
+        right = self.right_node.compile(slots, types)
+
+        if self.op == BinOp.L_AND:
+            def l_and_node(frame, console):
+                return to_boolean_raw(left(frame, console)) and to_boolean_raw(right(frame, console))
+            return l_and_node
+        elif self.op == BinOp.L_OR:
+            def l_or_node(frame, console):
+                return to_boolean_raw(left(frame, console)) or to_boolean_raw(right(frame, console))
+            return l_or_node
+
+        func = _raw_bin_op_funcs.get(self.op)
+        if func is None:
+            raise RuntimeError(f"Unknown BinOp {self.op.name}")
+
+        if types is not None:
+            left_types = self.left_node.value_types(types)
+            if len(left_types) == 1 and left_types == self.right_node.value_types(types):
+                # the types of the operands do not need to be checked
+                func = _typed_bin_op_funcs.get((next(iter(left_types)), self.op), func)
+
+        def bin_node(frame, console):
+            return func(left(frame, console), right(frame, console))
+        return bin_node
 
     def __str__(self):
         return f"BinNode(left_node={self.left_node}, right_node={self.right_node}, op={self.op.name})"
@@ -130,15 +378,60 @@ class UniNode(Node):
         self.op = op
 
     def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
+        func = _uni_op_funcs.get(self.op)
+        if func is None:
+            raise RuntimeError(f"Unknown UniOp {self.op.name}")
+        return func(self.node.evaluate(sym_table, console))
+
+    def resolve(self, slots: dict[str, int]) -> None:
+        self.node.resolve(slots)
+
+    def _fold(self) -> Node:
+        child = self.node.fold()
+        node = UniNode(child, self.op)
+        if isinstance(child, ValueNode):
+            return _evaluate_constant(node)
+
+        if self.op == UniOp.POS and _is_number(child):
+            return child
+        elif self.op == UniOp.NEG and isinstance(child, UniNode) and child.op == UniOp.NEG and _is_number(child.node):
+            return child.node
+        elif self.op == UniOp.NOT and isinstance(child, UniNode) and child.op == UniOp.NOT:
+            return CastNode(child.node, ExeValueType.BOOLEAN)
+        return node
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
         if self.op == UniOp.NOT:
-            return not_val(self.node.evaluate(sym_table, console))
-        elif self.op == UniOp.NEG:
-            return neg_val(self.node.evaluate(sym_table, console))
-        elif self.op == UniOp.POS:
-            return pos_val(self.node.evaluate(sym_table, console))
-        else:
+            return BOOLEAN_TYPES
+        return self.node.value_types(types) & NUMBER_TYPES
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        error = self.node.type_error(types)
+        if error is not None or self.op == UniOp.NOT:
+            return error
+        node_types = self.node.value_types(types)
+        if len(node_types) != 1 or node_types == NUMBER_TYPES:
+            return None
+        return ExecutionError(
+            "error.name.type_error",
+            "error.msg.invalid_uni_op_types",
+            operand="-" if self.op == UniOp.NEG else "+",
+            op_type=next(iter(node_types))
+        )
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        node = self.node.compile(slots, types)
+        func = _raw_uni_op_funcs.get(self.op)
+        if func is None:
             raise RuntimeError(f"Unknown UniOp {self.op.name}")
 
+        if types is not None and self.op == UniOp.NEG and self.node.value_types(types) == NUMBER_TYPES:
+            func = operator.neg
+
+        def uni_node(frame, console):
+            return func(node(frame, console))
+        return uni_node
+
     def __str__(self):
         return f"UniNode(node={self.node}, op={self.op.name})"
 
@@ -159,6 +452,33 @@ class FmtNode(Node):
         end_str += self.fmt_string[-1]
         return ExeString(end_str)
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        for ident in self.fmt_string[1::2]:
+            slots.setdefault(ident, len(slots))
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        return STRING_TYPES
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        for ident in self.fmt_string[1::2]:
+            if ident not in types:
+                return ExecutionError("error.name.var_error", "error.msg.var_not_defined", var_name=ident)
+        return None
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        parts = [(s, ident, slots[ident]) for s, ident in zip(self.fmt_string[::2], self.fmt_string[1::2])]
+        last_str = self.fmt_string[-1]
+
+        def fmt_node(frame, console):
+            end_str = ""
+            for s, ident, slot in parts:
+                value = frame[slot]
+                if value is UNDEFINED:
+                    raise_error("error.name.var_error", "error.msg.var_not_defined", var_name=ident)
+                end_str += s + str(value)
+            return end_str + last_str
+        return fmt_node
+
     def __str__(self):
         return f"FmtNode(fmt_string={self.fmt_string})"
 
@@ -172,6 +492,43 @@ class CastNode(Node):
     def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
         return cast_val(self.node.evaluate(sym_table, console), self.type)
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        self.node.resolve(slots)
+
+    def _fold(self) -> Node:
+        child = self.node.fold()
+        node = CastNode(child, self.type)
+        if isinstance(child, ValueNode):
+            return _evaluate_constant(node)
+        if self.type == ExeValueType.NUMBER and _is_number(child):
+            return child
+        return node
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        return frozenset((self.type,))
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        return self.node.type_error(types)
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        node = self.node.compile(slots, types)
+        # casting a value to its own type gives the same value
+        if types is not None and self.node.value_types(types) == frozenset((self.type,)):
+            return node
+
+        if self.type == ExeValueType.BOOLEAN:
+            func = to_boolean_raw
+        elif self.type == ExeValueType.STRING:
+            func = to_string_raw
+        elif self.type == ExeValueType.NUMBER:
+            func = to_number_raw
+        else:
+            raise RuntimeError(f"Unknown ExeValueType {self.type}")
+
+        def cast_node(frame, console):
+            return func(node(frame, console))
+        return cast_node
+
     def __str__(self):
         return f"CastNode(node={self.node}, type={self.type})"
 
@@ -187,6 +544,33 @@ class GetNode(Node):
             return ExeError("error.name.var_error", "error.msg.var_not_defined", var_name=self.name)
         return value
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        slots.setdefault(self.name, len(slots))
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        return types.get(self.name, UNDEFINED_TYPES) - UNDEFINED_TYPES
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        if self.name not in types:
+            return ExecutionError("error.name.var_error", "error.msg.var_not_defined", var_name=self.name)
+        return None
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        name = self.name
+        slot = slots[name]
+
+        if types is not None and UNDEFINED_TYPE not in types.get(name, UNDEFINED_TYPES):
+            def defined_get_node(frame, console):
+                return frame[slot]
+            return defined_get_node
+
+        def get_node(frame, console):
+            value = frame[slot]
+            if value is UNDEFINED:
+                raise_error("error.name.var_error", "error.msg.var_not_defined", var_name=name)
+            return value
+        return get_node
+
     def __str__(self):
         return f"GetNode(name={self.name!r})"
 
@@ -210,6 +594,56 @@ class SetNode(Node):
         sym_table[self.name] = value
         return ExeEmpty()
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        slots.setdefault(self.name, len(slots))
+        self.value.resolve(slots)
+
+    def _fold(self) -> Node:
+        return SetNode(self.name, self.value.fold(), self.init)
+
+    def infer_types(self, types: TypeEnv) -> TypeEnv:
+        types = types.copy()
+        types[self.name] = self.value.value_types(types)
+        return types
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        if self.init and self.name in types and UNDEFINED_TYPE not in types[self.name]:
+            return ExecutionError("error.name.var_error", "error.msg.var_already_defined", var_name=self.name)
+        elif not self.init and self.name not in types:
+            return ExecutionError("error.name.var_error", "error.msg.var_not_defined", var_name=self.name)
+        return self.value.type_error(types)
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        name = self.name
+        slot = slots[name]
+        value_node = self.value.compile(slots, types)
+
+        # the variable is always undefined before an initialization and always defined before an assignment
+        if types is None:
+            is_checked = True
+        elif self.init:
+            is_checked = name in types
+        else:
+            is_checked = UNDEFINED_TYPE in types.get(name, UNDEFINED_TYPES)
+
+        if not is_checked:
+            def unchecked_set_node(frame, console):
+                frame[slot] = value_node(frame, console)
+            return unchecked_set_node
+
+        if self.init:
+            def init_node(frame, console):
+                if frame[slot] is not UNDEFINED:
+                    raise_error("error.name.var_error", "error.msg.var_already_defined", var_name=name)
+                frame[slot] = value_node(frame, console)
+            return init_node
+
+        def set_node(frame, console):
+            if frame[slot] is UNDEFINED:
+                raise_error("error.name.var_error", "error.msg.var_not_defined", var_name=name)
+            frame[slot] = value_node(frame, console)
+        return set_node
+
     def __str__(self):
         return f"SetNode(name={self.name!r}, value={self.value}, init={self.init})"
 
@@ -227,6 +661,42 @@ class CompoundNode(Node):
 
         return ExeEmpty()
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        for node in self.nodes:
+            node.resolve(slots)
+
+    def _fold(self) -> Node:
+        return CompoundNode([node.fold() for node in self.nodes])
+
+    def infer_types(self, types: TypeEnv) -> TypeEnv:
+        for node in self.nodes:
+            types = node.infer_types(types)
+        return types
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        for node in self.nodes:
+            error = node.type_error(types)
+            if error is not None:
+                return error
+            types = node.infer_types(types)
+        return None
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        compiled_nodes = []
+        for node in self.nodes:
+            compiled_nodes.append(node.compile(slots, types))
+            if types is not None:
+                types = node.infer_types(types)
+        nodes = tuple(compiled_nodes)
+
+        if len(nodes) == 1:
+            return nodes[0]
+
+        def compound_node(frame, console):
+            for node in nodes:
+                node(frame, console)
+        return compound_node
+
     def __str__(self):
         return f"CompoundNode(nodes={self.nodes})"
 
@@ -243,6 +713,27 @@ class WriteNode(Node):
         console.stdout_write(value.value)
         return ExeEmpty()
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        self.node.resolve(slots)
+
+    def _fold(self) -> Node:
+        return WriteNode(self.node.fold())
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        return self.node.type_error(types)
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        node = self.node.compile(slots, types)
+
+        if types is not None and self.node.value_types(types) == STRING_TYPES:
+            def write_string_node(frame, console):
+                console.stdout_write(node(frame, console))
+            return write_string_node
+
+        def write_node(frame, console):
+            console.stdout_write(to_string_raw(node(frame, console)))
+        return write_node
+
     def __str__(self):
         return f"WriteNode(node={self.node})"
 
@@ -253,7 +744,7 @@ class ReadNode(Node):
         self.name = name
         self.type = type_
 
-    def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
+    def __read_value(self, console: Console) -> ExeValue:
         while True:
             console.stdin_hint(f"{self.name} ({self.type})")
             value = ExeString(console.stdin_read())
@@ -267,10 +758,28 @@ class ReadNode(Node):
             else:
                 value = cast_val(value, self.type)
             if not value.error():
-                sym_table[self.name] = value
-                break
+                return value
+
+    def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
+        sym_table[self.name] = self.__read_value(console)
         return ExeEmpty()
 
+    def resolve(self, slots: dict[str, int]) -> None:
+        slots.setdefault(self.name, len(slots))
+
+    def infer_types(self, types: TypeEnv) -> TypeEnv:
+        types = types.copy()
+        types[self.name] = frozenset((self.type,))
+        return types
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        slot = slots[self.name]
+        read_value = self.__read_value
+
+        def read_node(frame, console):
+            frame[slot] = read_value(console).value
+        return read_node
+
     def __str__(self):
         return f"ReadNode(name={self.name!r}, type={self.type})"
 
@@ -281,51 +790,186 @@ class CallNode(Node):
         self.func_name = func_name
         self.arg_nodes = arg_nodes
 
+    def __builtin(self) -> Builtin:
+        """Returns the function called, raising ExecutionException if it does not exist or the arguments are wrong"""
+        builtin = get_builtin(self.func_name)
+        if builtin is None:
+            raise_error("error.name.call_error", "error.msg.func_not_defined", func=self.func_name)
+        error = builtin.arg_count_error(len(self.arg_nodes))
+        if error is not None:
+            raise ExecutionException(error)
+        return builtin
+
     def evaluate(self, sym_table: dict, console: Console) -> ExeValue:
         arg_values = []
         for arg_node in self.arg_nodes:
             value = arg_node.evaluate(sym_table, console)
             if value.error():
                 return value
-            arg_values.append(value)
-
-        if self.func_name == "mod":
-            value = mod_func(arg_values)
-        elif self.func_name == "sin":
-            value = sin_func(arg_values)
-        elif self.func_name == "cos":
-            value = cos_func(arg_values)
-        elif self.func_name == "tan":
-            value = tan_func(arg_values)
-        elif self.func_name == "arcsin":
-            value = arcsin_func(arg_values)
-        elif self.func_name == "arccos":
-            value = arccos_func(arg_values)
-        elif self.func_name == "arctan":
-            value = arctan_func(arg_values)
-        elif self.func_name == "floor":
-            value = floor_func(arg_values)
-        elif self.func_name == "ceil":
-            value = ceil_func(arg_values)
-        elif self.func_name == "round":
-            value = round_func(arg_values)
-        elif self.func_name == "log":
-            value = log_func(arg_values)
-        elif self.func_name == "sign":
-            value = sign_func(arg_values)
-        elif self.func_name == "sqrt":
-            value = sqrt_func(arg_values)
-        elif self.func_name == "root":
-            value = root_func(arg_values)
-        elif self.func_name == "max":
-            value = max_func(arg_values)
-        elif self.func_name == "min":
-            value = min_func(arg_values)
-        elif self.func_name == "abs":
-            value = abs_func(arg_values)
-        else:
-            value = ExeError("error.name.call_error", "error.msg.func_not_defined", func=self.func_name)
-        return value
+            arg_values.append(unbox_value(value))
+
+        try:
+            return box_value(self.__builtin().call(arg_values))
+        except ExecutionException as e:
+            return ExeError(e.error.name, e.error.msg, **e.error.fmt_args)
+
+    def resolve(self, slots: dict[str, int]) -> None:
+        for arg_node in self.arg_nodes:
+            arg_node.resolve(slots)
+
+    def _fold(self) -> Node:
+        node = CallNode(self.func_name, [arg_node.fold() for arg_node in self.arg_nodes])
+        builtin = get_builtin(self.func_name)
+        if builtin is None or not builtin.pure or builtin.arg_count_error(len(self.arg_nodes)) is not None:
+            return node
+        # a pure function called with constant arguments always gives the same result
+        if all(isinstance(arg_node, ValueNode) for arg_node in node.arg_nodes):
+            return _evaluate_constant(node)
+        return node
+
+    def value_types(self, types: TypeEnv) -> frozenset[str]:
+        builtin = get_builtin(self.func_name)
+        if builtin is None:
+            return frozenset()
+        return frozenset((builtin.return_type,))
+
+    def type_error(self, types: TypeEnv) -> ExecutionError | None:
+        for arg_node in self.arg_nodes:
+            error = arg_node.type_error(types)
+            if error is not None:
+                return error
+
+        builtin = get_builtin(self.func_name)
+        if builtin is None:
+            return None
+        for i, arg_node in enumerate(self.arg_nodes):
+            arg_types = arg_node.value_types(types)
+            if len(arg_types) != 1:
+                continue
+            arg_type, = arg_types
+            if arg_type != builtin.arg_type(i):
+                return builtin.arg_type_error(i, arg_type)
+        return None
+
+    def compile(self, slots: dict[str, int], types: TypeEnv | None = None) -> CompiledNode:
+        builtin = self.__builtin()
+        arg_nodes = tuple(arg_node.compile(slots, types) for arg_node in self.arg_nodes)
+        call_counts = _call_counts
+        if call_counts is not None:
+            func_name = self.func_name
+            call_counts.setdefault(func_name, 0)
+            call = builtin.call
+
+            def counted_call_node(frame, console):
+                call_counts[func_name] += 1
+                return call([arg_node(frame, console) for arg_node in arg_nodes])
+            return counted_call_node
+
+        # when the types of all the arguments are known the function is called without checking them
+        if types is not None and all(
+            arg_node.value_types(types) == frozenset((builtin.arg_type(i),))
+            for i, arg_node in enumerate(self.arg_nodes)
+        ):
+            func = builtin.func
+            if len(arg_nodes) == 0:
+                def call_node(frame, console):
+                    return func()
+            elif len(arg_nodes) == 1:
+                arg_node, = arg_nodes
+
+                def call_node(frame, console):
+                    return func(arg_node(frame, console))
+            elif len(arg_nodes) == 2:
+                arg1_node, arg2_node = arg_nodes
+
+                def call_node(frame, console):
+                    return func(arg1_node(frame, console), arg2_node(frame, console))
+            else:
+                def call_node(frame, console):
+                    return func(*[arg_node(frame, console) for arg_node in arg_nodes])
+            return call_node
+
+        call = builtin.call
+
+        def call_node(frame, console):
+            return call([arg_node(frame, console) for arg_node in arg_nodes])
+        return call_node
 
     def __str__(self):
         return f"CallNode(func_name={self.func_name!r}, arg_nodes={self.arg_nodes})"
+
+
+def _bin_op_type(op: BinOp, left_type: str, right_type: str) -> str | None:
+    """Returns the type of the result of op with operands of the given types, None if it is a type error"""
+    if op in (BinOp.L_AND, BinOp.L_OR, BinOp.EQ, BinOp.NE):
+        return ExeValueType.BOOLEAN
+    elif op == BinOp.ADD:
+        if left_type == ExeValueType.NUMBER and right_type == ExeValueType.NUMBER:
+            return ExeValueType.NUMBER
+        elif left_type == ExeValueType.STRING or right_type == ExeValueType.STRING:
+            return ExeValueType.STRING
+        return None
+    elif op in (BinOp.GT, BinOp.LT, BinOp.GE, BinOp.LE):
+        if left_type == right_type and left_type != ExeValueType.BOOLEAN:
+            return ExeValueType.BOOLEAN
+        return None
+    elif left_type == ExeValueType.NUMBER and right_type == ExeValueType.NUMBER:
+        return ExeValueType.NUMBER
+    return None
+
+
+# the largest power of integers folded at compile time, in bits, bigger ones are computed only when executed
+_MAX_FOLDED_POW_BITS = 4096
+
+
+def _evaluate_constant(node: Node) -> Node:
+    """Evaluates a node whose operands are all ValueNodes"""
+    try:
+        value = node.evaluate({}, None)
+    except (ArithmeticError, ValueError):
+        # the exception is raised again when the node is executed and the VM reports it as an error of the block
+        return node
+    return node if value.error() else ValueNode(value)
+
+
+def _is_large_pow(op: BinOp, left: ExeValue, right: ExeValue) -> bool:
+    """Whether op is a power of integers whose result would take too long to compute"""
+    if op != BinOp.POW or not isinstance(left.value, int) or not isinstance(right.value, int):
+        return False
+    # a negative exponent gives a float and the powers of 0, 1 and -1 are small
+    if right.value <= 0 or abs(left.value) <= 1:
+        return False
+    return right.value * math.log2(abs(left.value)) > _MAX_FOLDED_POW_BITS
+
+
+def _is_int_value(node: Node, value: int) -> bool:
+    return isinstance(node, ValueNode) \
+        and node.value.number() \
+        and isinstance(node.value.value, int) \
+        and node.value.value == value
+
+
+def _is_number(node: Node) -> bool:
+    """Whether the node always evaluates to a number or to an error"""
+    if isinstance(node, ValueNode):
+        return node.value.number()
+    elif isinstance(node, BinNode):
+        if node.op in (BinOp.SUB, BinOp.MUL, BinOp.DIV, BinOp.MOD, BinOp.POW):
+            return True
+        return node.op == BinOp.ADD and _is_number(node.left_node) and _is_number(node.right_node)
+    elif isinstance(node, UniNode):
+        return node.op != UniOp.NOT
+    elif isinstance(node, CastNode):
+        return node.type == ExeValueType.NUMBER
+    elif isinstance(node, CallNode):
+        builtin = get_builtin(node.func_name)
+        return builtin is not None and builtin.return_type == ExeValueType.NUMBER
+    return False
+
+
+def resolve_slots(nodes: Iterable[Node]) -> dict[str, int]:
+    """Assigns to each variable used by the nodes the index of its slot in a frame"""
+    slots = {}
+    for node in nodes:
+        node.resolve(slots)
+    return slots
@@ -5,12 +5,22 @@ from .lexer import Lexer
 from ui_components import IOBlock, CondBlock, InitBlock, CalcBlock, BlockBase
 
 
-def full_compilation(block: BlockBase) -> Node | ExecutionError:
-    lexer = Lexer(block.content.text)
-    tokens = lexer.tokenize()
+def full_compilation(block: BlockBase, text: str | None = None) -> Node | ExecutionError:
+    """Compiles text as the content of the block, by default the current content of the block"""
+    if text is None:
+        text = block.content.text
+    tokens = Lexer(text).tokenize()
     if isinstance(tokens, ExecutionError):
         return tokens
-    parser = Parser(tokens)
+    ast = parse_block(block, tokens, len(text))
+    if isinstance(ast, ExecutionError):
+        return ast
+    return ast.fold()
+
+
+def parse_block(block: BlockBase, tokens: list[Token], source_length: int | None = None) -> Node | ExecutionError:
+    """Parses the tokens of the content of a block, the tree that is returned is not folded"""
+    parser = Parser(tokens, source_length)
     if isinstance(block, IOBlock) and block.is_input:
         ast = parser.parse_input_block()
     elif isinstance(block, IOBlock):
@@ -26,111 +36,187 @@ def full_compilation(block: BlockBase) -> Node | ExecutionError:
     return ast
 
 
-# Operator precedence
+class TextValidator:
+    """
+    Checks the text of a block while it is edited, after an edit only the changed part of the text is tokenized
+    again
+    """
+    def __init__(self, block: BlockBase):
+        self.block = block
+        self.__text: str | None = None
+        self.__tokens: list[Token] | ExecutionError | None = None
+
+    def validate(self, text: str, edit_range: tuple[int, int, int] | None = None) -> ExecutionError | None:
+        """
+        Returns the syntax error in the text, if any. edit_range is the change made to the text that was last
+        validated, see Lexer.retokenize
+        """
+        lexer = Lexer(text)
+        if (
+            edit_range is None
+            or self.__tokens is None
+            or len(self.__text) + edit_range[2] - edit_range[1] != len(text)
+        ):
+            tokens = lexer.tokenize()
+        else:
+            tokens = lexer.retokenize(self.__tokens, edit_range)
+        self.__text = text
+        self.__tokens = tokens
+
+        if isinstance(tokens, ExecutionError):
+            return tokens
+        ast = parse_block(self.block, tokens, len(text))
+        if isinstance(ast, ExecutionError):
+            return ast
+        return None
+
+
+# Operator precedence, from the lowest
 # or
 # and
 # not
 # ==, !=, >, <, >=, <=
 # +, -
 # *, /, %
-# ^
+# ^ (right associative)
 # as
 # (unary) +, (unary) -
+# The binary operators of the same precedence are left associative unless specified otherwise
+_OR_PREC = 1
+_AND_PREC = 2
+_NOT_PREC = 3
+_REL_PREC = 4
+_ADD_PREC = 5
+_MUL_PREC = 6
+_POW_PREC = 7
+
+# maps the type and the value of a token to the binary operator, its precedence and whether it is right associative
+_bin_ops = {
+    (TokenType.KEYWORD, "or"): (BinOp.L_OR, _OR_PREC, False),
+    (TokenType.KEYWORD, "and"): (BinOp.L_AND, _AND_PREC, False),
+    (TokenType.DOUB_EQ, None): (BinOp.EQ, _REL_PREC, False),
+    (TokenType.BANG_EQ, None): (BinOp.NE, _REL_PREC, False),
+    (TokenType.GREATER, None): (BinOp.GT, _REL_PREC, False),
+    (TokenType.LESS, None):    (BinOp.LT, _REL_PREC, False),
+    (TokenType.GRT_EQ, None):  (BinOp.GE, _REL_PREC, False),
+    (TokenType.LESS_EQ, None): (BinOp.LE, _REL_PREC, False),
+    (TokenType.PLUS, None):  (BinOp.ADD, _ADD_PREC, False),
+    (TokenType.MINUS, None): (BinOp.SUB, _ADD_PREC, False),
+    (TokenType.STAR, None):  (BinOp.MUL, _MUL_PREC, False),
+    (TokenType.SLASH, None): (BinOp.DIV, _MUL_PREC, False),
+    (TokenType.PERC, None):  (BinOp.MOD, _MUL_PREC, False),
+    (TokenType.CARET, None): (BinOp.POW, _POW_PREC, True),
+}
 
 
 class Parser:
-    def __init__(self, tokens: list[Token]):
+    def __init__(self, tokens: list[Token], source_length: int | None = None):
+        """source_length is the length of the tokenized text, used as the position of errors at the end of it"""
         self.tokens = tokens
         self.idx = 0
+        if source_length is None:
+            source_length = tokens[-1].end if tokens and tokens[-1].end is not None else 0
+        self.source_length = source_length
 
     def parse_input_block(self) -> Node | ExecutionError:
+        block_start = self.tok_start
         if self.tok != (TokenType.KEYWORD, "read"):
-            return ExecutionError("error.name.syntax_error", "error.msg.expected_keyword", keyword="read")
+            return self.syntax_error("error.msg.expected_keyword", keyword="read")
         self.advance()
 
         nodes = []
 
         while True:
             if self.tok != TokenType.IDENT:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_ident")
+                return self.syntax_error("error.msg.expected_ident")
+            start = self.tok_start
             ident = self.tok.value
             self.advance()
             if self.tok != (TokenType.KEYWORD, "as"):
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_keyword", keyword="as")
+                return self.syntax_error("error.msg.expected_keyword", keyword="as")
             self.advance()
             if self.tok != TokenType.TYPE:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_type", keyword="as")
+                return self.syntax_error("error.msg.expected_type", keyword="as")
             type_ = self.__type_name_to_type(self.tok.value)
             self.advance()
 
-            nodes.append(ReadNode(ident, type_))
+            nodes.append(self.spanned(ReadNode(ident, type_), start))
             if self.tok != TokenType.COMMA:
                 break
             self.advance()
 
         if not self.finished:
-            return ExecutionError("error.name.syntax_error", "error.msg.unexpected_token", tok_type=self.tok.type.name)
-        return CompoundNode(nodes)
+            return self.syntax_error("error.msg.unexpected_token", tok_type=self.tok.type.name)
+        return self.spanned(CompoundNode(nodes), block_start)
 
     def parse_output_block(self) -> Node | ExecutionError:
+        start = self.tok_start
         value = self.parse_expr()
         if self.is_error(value):
             return value
         if not self.finished:
-            return ExecutionError("error.name.syntax_error", "error.msg.unexpected_token", tok_type=self.tok.type.name)
-        return WriteNode(value)
+            return self.syntax_error("error.msg.unexpected_token", tok_type=self.tok.type.name)
+        return self.spanned(WriteNode(value), start)
 
     def parse_cond_block(self) -> Node | ExecutionError:
         value = self.parse_expr()
         if self.is_error(value):
             return value
         if not self.finished:
-            return ExecutionError("error.name.syntax_error", "error.msg.unexpected_token", tok_type=self.tok.type.name)
+            return self.syntax_error("error.msg.unexpected_token", tok_type=self.tok.type.name)
         return value
 
     def parse_init_block(self) -> Node | ExecutionError:
+        block_start = self.tok_start
         nodes = []
 
         while True:
             if self.tok != TokenType.IDENT:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_ident")
+                return self.syntax_error("error.msg.expected_ident")
+            start = self.tok_start
             ident = self.tok.value
             self.advance()
             if self.tok != TokenType.EQUALS:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_sym", string="=")
+                return self.syntax_error("error.msg.expected_sym", string="=")
             self.advance()
             value = self.parse_expr()
             if self.is_error(value):
                 return value
 
-            nodes.append(SetNode(ident, value, True))
+            nodes.append(self.spanned(SetNode(ident, value, True), start))
             if self.tok != TokenType.COMMA:
                 break
             self.advance()
 
-        return CompoundNode(nodes)
+        if not self.finished:
+            return self.syntax_error("error.msg.unexpected_token", tok_type=self.tok.type.name)
+        return self.spanned(CompoundNode(nodes), block_start)
 
     def parse_calc_block(self) -> Node | ExecutionError:
+        block_start = self.tok_start
         nodes = []
 
         while True:
             if self.tok != TokenType.IDENT:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_ident")
+                return self.syntax_error("error.msg.expected_ident")
+            start = self.tok_start
             ident = self.tok.value
             self.advance()
             if self.tok != TokenType.EQUALS:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_sym", string="=")
+                return self.syntax_error("error.msg.expected_sym", string="=")
             self.advance()
             value = self.parse_expr()
             if self.is_error(value):
                 return value
 
-            nodes.append(SetNode(ident, value, False))
+            nodes.append(self.spanned(SetNode(ident, value, False), start))
             if self.tok != TokenType.COMMA:
                 break
             self.advance()
 
-        return CompoundNode(nodes)
+        if not self.finished:
+            return self.syntax_error("error.msg.unexpected_token", tok_type=self.tok.type.name)
+        return self.spanned(CompoundNode(nodes), block_start)
 
     @property
     def tok(self):
@@ -145,123 +231,97 @@ class Parser:
     def advance(self):
         self.idx += 1
 
+    @property
+    def tok_start(self) -> int | None:
+        """The offset of the current token in the source"""
+        if self.finished:
+            return self.source_length
+        return self.tok.start
+
+    def spanned(self, node: Node, start: int | None) -> Node:
+        """Sets the span of the node from start to the end of the last token read"""
+        end = self.tokens[self.idx - 1].end if self.idx != 0 else start
+        if start is not None and end is not None:
+            node.span = (start, end)
+        return node
+
+    def syntax_error(self, msg: str, **fmt_args) -> ExecutionError:
+        """Returns a syntax error positioned on the current token"""
+        error = ExecutionError("error.name.syntax_error", msg, **fmt_args)
+        if self.finished:
+            return error.at(self.source_length, self.source_length)
+        if self.tok.start is not None:
+            return error.at(self.tok.start, self.tok.end)
+        return error
+
     @staticmethod
     def is_error(node: Node | ExecutionError):
         return isinstance(node, ExecutionError)
 
-    def __parse_bin_op(self, operators, next_level):
-        left_node = next_level()
-        if self.is_error(left_node):
-            return left_node
-
-        if self.tok in operators:
-            op = operators[self.tok]
-        else:
-            return left_node
-
-        self.advance()
-        right_node = next_level()
-        if self.is_error(right_node):
-            return right_node
-
-        return BinNode(left_node, right_node, op)
-
-    def parse_expr(self) -> Node | ExecutionError:
-        return self.__parse_bin_op(
-            {
-                Token(TokenType.KEYWORD, "or"): BinOp.L_OR
-            },
-            self.parse_l_and
-        )
-
-    def parse_l_and(self) -> Node | ExecutionError:
-        return self.__parse_bin_op(
-            {
-                Token(TokenType.KEYWORD, "and"): BinOp.L_AND
-            },
-            self.parse_l_not
-        )
-
-    def parse_l_not(self) -> Node | ExecutionError:
-        if self.tok == (TokenType.KEYWORD, "not"):
+    def parse_expr(self, min_prec: int = _OR_PREC) -> Node | ExecutionError:
+        """Parses an expression made only of the operators with a precedence of at least min_prec"""
+        start = self.tok_start
+        tokens = self.tokens
+        if self.tok == (TokenType.KEYWORD, "not") and min_prec <= _NOT_PREC:
             self.advance()
-            value = self.parse_relation()
+            value = self.parse_expr(_REL_PREC)
             if self.is_error(value):
                 return value
-            return UniNode(value, UniOp.NOT)
-        return self.parse_relation()
-
-    def parse_relation(self) -> Node | ExecutionError:
-        return self.__parse_bin_op(
-            {
-                Token(TokenType.DOUB_EQ): BinOp.EQ,
-                Token(TokenType.BANG_EQ): BinOp.NE,
-                Token(TokenType.GREATER): BinOp.GT,
-                Token(TokenType.LESS):    BinOp.LT,
-                Token(TokenType.GRT_EQ):  BinOp.GE,
-                Token(TokenType.LESS_EQ): BinOp.LE
-            },
-            self.parse_addend
-        )
-
-    def parse_addend(self) -> Node | ExecutionError:
-        return self.__parse_bin_op(
-            {
-                Token(TokenType.PLUS): BinOp.ADD,
-                Token(TokenType.MINUS): BinOp.SUB
-            },
-            self.parse_factor
-        )
-
-    def parse_factor(self) -> Node | ExecutionError:
-        return self.__parse_bin_op(
-            {
-                Token(TokenType.STAR): BinOp.MUL,
-                Token(TokenType.SLASH): BinOp.DIV,
-                Token(TokenType.PERC): BinOp.MOD
-            },
-            self.parse_pow
-        )
-
-    def parse_pow(self) -> Node | ExecutionError:
-        return self.__parse_bin_op(
-            {
-                Token(TokenType.CARET): BinOp.POW
-            },
-            self.parse_cast
-        )
-
-    def parse_cast(self):
+            left_node = self.spanned(UniNode(value, UniOp.NOT), start)
+        else:
+            left_node = self.parse_cast()
+            if self.is_error(left_node):
+                return left_node
+
+        while self.idx < len(tokens):
+            tok = tokens[self.idx]
+            op_info = _bin_ops.get((tok.type, tok.value))
+            if op_info is None or op_info[1] < min_prec:
+                break
+            op, prec, right_assoc = op_info
+            self.advance()
+            right_node = self.parse_expr(prec if right_assoc else prec + 1)
+            if self.is_error(right_node):
+                return right_node
+            left_node = self.spanned(BinNode(left_node, right_node, op), start)
+
+        return left_node
+
+    def parse_cast(self) -> Node | ExecutionError:
+        start = self.tok_start
         value = self.parse_value()
-        if self.is_error(value) or self.tok != (TokenType.KEYWORD, "as"):
+        if self.is_error(value):
             return value
-        self.advance()
-        if self.tok != TokenType.TYPE:
-            return ExecutionError("error.name.syntax_error", "error.msg.expected_type")
-        type_ = self.__type_name_to_type(self.tok.value)
-        self.advance()
-        return CastNode(value, type_)
+        while self.tok == (TokenType.KEYWORD, "as"):
+            self.advance()
+            if self.tok != TokenType.TYPE:
+                return self.syntax_error("error.msg.expected_type")
+            type_ = self.__type_name_to_type(self.tok.value)
+            self.advance()
+            value = self.spanned(CastNode(value, type_), start)
+        return value
 
     def parse_value(self) -> Node | ExecutionError:
         if self.finished:
-            return ExecutionError("error.name.syntax_error", "error.msg.expected_value")
+            return self.syntax_error("error.msg.expected_value")
 
+        start = self.tok_start
         if self.tok == TokenType.NUMBER:
             node = ValueNode(ExeNumber(self.tok.value))
             self.advance()
-            return node
+            return self.spanned(node, start)
         elif self.tok == TokenType.BOOLEAN:
             node = ValueNode(ExeBoolean(self.tok.value))
             self.advance()
-            return node
+            return self.spanned(node, start)
         elif self.tok == TokenType.STRING:
             node = ValueNode(ExeString(self.tok.value))
             self.advance()
-            return node
+            return self.spanned(node, start)
         elif self.tok == TokenType.FORMAT_STRING:
             node = FmtNode(self.tok.value)
             self.advance()
-            return node
+            return self.spanned(node, start)
         elif self.tok == TokenType.IDENT:
             return self.parse_function_call()
         elif self.tok == TokenType.PLUS:
@@ -269,44 +329,57 @@ class Parser:
             value = self.parse_value()
             if self.is_error(value):
                 return value
-            return UniNode(value, UniOp.POS)
+            return self.spanned(UniNode(value, UniOp.POS), start)
         elif self.tok == TokenType.MINUS:
             self.advance()
             value = self.parse_value()
             if self.is_error(value):
                 return value
-            return UniNode(value, UniOp.NEG)
+            return self.spanned(UniNode(value, UniOp.NEG), start)
         elif self.tok == TokenType.LPAREN:
             self.advance()
             expr = self.parse_expr()
             if self.is_error(expr):
                 return expr
             if self.tok != TokenType.RPAREN:
-                return ExecutionError("error.name.syntax_error", "error.msg.expected_sym", string=")")
+                return self.syntax_error("error.msg.expected_sym", string=")")
             self.advance()
             return expr
         else:
-            return ExecutionError("error.name.syntax_error", "error.msg.unexpected_token", tok_type=self.tok.type.name)
+            return self.syntax_error("error.msg.unexpected_token", tok_type=self.tok.type.name)
 
     def parse_function_call(self):
+        start = self.tok_start
         ident = self.tok.value
         self.advance()
         if self.tok != TokenType.LPAREN:
-            return GetNode(ident)
+            return self.spanned(GetNode(ident), start)
+        # unknown functions and calls with the wrong number of arguments are reported when compiling
+        builtin = get_builtin(ident)
+        if builtin is None:
+            return self.spanned(
+                ExecutionError("error.name.call_error", "error.msg.func_not_defined", func=ident),
+                start
+            )
         self.advance()
         args = []
-        while not self.finished:
-            value = self.parse_expr()
-            if self.is_error(value):
-                return value
-            args.append(value)
-            if self.tok != TokenType.COMMA:
-                break
-            self.advance()
+        # an expression is required after each comma, only the list as a whole can be empty
+        if self.tok != TokenType.RPAREN:
+            while True:
+                value = self.parse_expr()
+                if self.is_error(value):
+                    return value
+                args.append(value)
+                if self.tok != TokenType.COMMA:
+                    break
+                self.advance()
         if self.tok != TokenType.RPAREN:
-            return ExecutionError("error.name.syntax_error", "error.msg.expected_sym", string=")")
+            return self.syntax_error("error.msg.expected_sym", string=")")
         self.advance()
-        return CallNode(ident, args)
+        error = builtin.arg_count_error(len(args))
+        if error is not None:
+            return self.spanned(error, start)
+        return self.spanned(CallNode(ident, args), start)
 
     @staticmethod
     def __type_name_to_type(type_name):
@@ -0,0 +1,59 @@
+import csv
+from typing import TextIO
+
+from ui_components import BlockBase
+
+
+class Profile:
+    """The number of times each block was executed, the time spent in it and the calls to each builtin function"""
+    def __init__(self):
+        self.block_counts: dict[int, int] = {}
+        self.block_times: dict[int, float] = {}
+        self.call_counts: dict[str, int] = {}
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.block_times.values())
+
+    def heat_map(self) -> dict[int, float]:
+        """
+        Maps each executed block to the time spent in it relative to the block where the most time was spent, between
+        0 and 1
+        """
+        max_time = max(self.block_times.values(), default=0)
+        if max_time <= 0:
+            return dict.fromkeys(self.block_counts, 0.0)
+        return {block_id: self.block_times.get(block_id, 0) / max_time for block_id in self.block_counts}
+
+    def __rows(self, blocks: list[BlockBase]) -> list[tuple[int, BlockBase, int, float]]:
+        rows = []
+        for i, block in enumerate(blocks):
+            count = self.block_counts.get(id(block))
+            if count is not None:
+                rows.append((i, block, count, self.block_times.get(id(block), 0)))
+        # the slowest blocks first
+        rows.sort(key=lambda row: (-row[3], row[0]))
+        return rows
+
+    def write_report(self, f: TextIO, blocks: list[BlockBase]) -> None:
+        """Writes a table of the executed blocks, the index of a block is its position in blocks"""
+        total_time = self.total_time
+        f.write(f"{'count':>10} {'time (s)':>12} {'%':>6}  block\n")
+        for i, block, count, time in self.__rows(blocks):
+            percent = time / total_time * 100 if total_time > 0 else 0
+            f.write(f"{count:>10} {time:>12.6f} {percent:>6.1f}  #{i} {_block_description(block)}\n")
+
+        if self.call_counts:
+            f.write(f"\n{'calls':>10}  function\n")
+            for func_name, count in sorted(self.call_counts.items(), key=lambda item: (-item[1], item[0])):
+                f.write(f"{count:>10}  {func_name}\n")
+
+    def write_csv(self, f: TextIO, blocks: list[BlockBase]) -> None:
+        writer = csv.writer(f)
+        writer.writerow(("block", "type", "content", "count", "time"))
+        for i, block, count, time in self.__rows(blocks):
+            writer.writerow((i, block.__class__.__name__, block.content.text, count, f"{time:.9f}"))
+
+
+def _block_description(block: BlockBase) -> str:
+    return f"{block.__class__.__name__}: {block.content.text.replace(chr(10), ' ')}"
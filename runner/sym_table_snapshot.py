@@ -0,0 +1,146 @@
+import struct
+from multiprocessing import shared_memory
+
+# the longest string stored in the snapshot, in bytes, longer ones are cut
+MAX_STRING_SIZE = 256
+
+_HEADER = struct.Struct("<QI")  # sequence number, size of the data
+_TAG = struct.Struct("<B")
+_INT = struct.Struct("<Bq")
+_FLOAT = struct.Struct("<Bd")
+_BOOL = struct.Struct("<B?")
+_STR = struct.Struct("<BI")
+
+_MAX_SLOT_SIZE = _STR.size + MAX_STRING_SIZE
+_MIN_INT = -2 ** 63
+_MAX_INT = 2 ** 63 - 1
+
+_TAG_UNDEFINED = 0
+_TAG_INT = 1
+_TAG_FLOAT = 2
+_TAG_BOOL = 3
+_TAG_STR = 4
+_TAG_BIG_INT = 5  # an integer that does not fit in 64 bits, stored as its string representation
+
+# how many times a reader tries again when it sees a snapshot being written
+_READ_ATTEMPTS = 8
+
+
+class SymTableSnapshot:
+    """
+    The values of the variables of a running flowchart in shared memory.
+
+    The runner process overwrites the whole snapshot in place with write() and the editor reads it with read().
+    The sequence number in the header works as a seqlock: it is odd while the data is being written and is
+    increased again once the write is complete, a reader that sees it odd or changed discards what it read.
+    The number also tells the reader if anything changed since the last read.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slot_count: int, owner: bool):
+        self.shm = shm
+        self.slot_count = slot_count
+        self.owner = owner
+        self._seq = 0
+
+    @classmethod
+    def create(cls, slot_count: int):
+        size = _HEADER.size + _MAX_SLOT_SIZE * slot_count
+        snapshot = cls(shared_memory.SharedMemory(create=True, size=size), slot_count, True)
+        snapshot.write([None] * slot_count)
+        return snapshot
+
+    @classmethod
+    def attach(cls, name: str, slot_count: int):
+        try:
+            # the creator is responsible for unlinking the memory, the reader must not track it
+            shm = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name)
+        snapshot = cls(shm, slot_count, False)
+        # continue from the snapshot written by the creator, or the first write would repeat its sequence number
+        snapshot._seq = _HEADER.unpack_from(shm.buf, 0)[0]
+        return snapshot
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, values: list) -> None:
+        """values contains the raw value of each slot, None for variables that are not defined"""
+        data = bytearray()
+        for value in values:
+            data += _encode_value(value)
+
+        buf = self.shm.buf
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, len(data))
+        buf[_HEADER.size:_HEADER.size + len(data)] = data
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, len(data))
+
+    def read(self, last_seq: int = -1) -> tuple[int, list] | None:
+        """
+        Returns the sequence number and the values of the snapshot, or None if it did not change since last_seq or a
+        consistent copy could not be read.
+        """
+        buf = self.shm.buf
+        for _ in range(_READ_ATTEMPTS):
+            seq, size = _HEADER.unpack_from(buf, 0)
+            if seq == last_seq:
+                return None
+            if seq & 1:
+                continue
+            data = bytes(buf[_HEADER.size:_HEADER.size + size])
+            if _HEADER.unpack_from(buf, 0)[0] == seq:
+                return seq, _decode_values(data, self.slot_count)
+        return None
+
+    def close(self) -> None:
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _encode_value(value) -> bytes:
+    if value is None:
+        return _TAG.pack(_TAG_UNDEFINED)
+    elif isinstance(value, bool):
+        return _BOOL.pack(_TAG_BOOL, value)
+    elif isinstance(value, int):
+        if _MIN_INT <= value <= _MAX_INT:
+            return _INT.pack(_TAG_INT, value)
+        value = str(value)
+        tag = _TAG_BIG_INT
+    elif isinstance(value, float):
+        return _FLOAT.pack(_TAG_FLOAT, value)
+    else:
+        value = str(value)
+        tag = _TAG_STR
+    encoded = value.encode("utf-8")[:MAX_STRING_SIZE]
+    return _STR.pack(tag, len(encoded)) + encoded
+
+
+def _decode_values(data: bytes, slot_count: int) -> list:
+    values = []
+    idx = 0
+    for _ in range(slot_count):
+        tag = data[idx]
+        if tag == _TAG_UNDEFINED:
+            values.append(None)
+            idx += _TAG.size
+        elif tag == _TAG_INT:
+            values.append(_INT.unpack_from(data, idx)[1])
+            idx += _INT.size
+        elif tag == _TAG_FLOAT:
+            values.append(_FLOAT.unpack_from(data, idx)[1])
+            idx += _FLOAT.size
+        elif tag == _TAG_BOOL:
+            values.append(_BOOL.unpack_from(data, idx)[1])
+            idx += _BOOL.size
+        else:
+            size = _STR.unpack_from(data, idx)[1]
+            idx += _STR.size
+            # strings may have been cut in the middle of a character
+            values.append(data[idx:idx + size].decode("utf-8", errors="ignore"))
+            idx += size
+    return values
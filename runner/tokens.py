@@ -1,3 +1,4 @@
+from __future__ import annotations
 from enum import Enum, auto
 
 
@@ -28,9 +29,17 @@ class TokenType(Enum):
 
 
 class Token:
-    def __init__(self, type_, value=None):
+    """start and end are the offsets of the first character of the token and of the one after it in the source"""
+    def __init__(self, type_, value=None, start=None, end=None):
         self.type = type_
         self.value = value
+        self.start = start
+        self.end = end
+
+    def shifted(self, offset: int) -> Token:
+        if offset == 0:
+            return self
+        return Token(self.type, self.value, self.start + offset, self.end + offset)
 
     def __eq__(self, other):
         if isinstance(other, Token):
@@ -0,0 +1,54 @@
+from .error import ExecutionError
+from .nodes import Node, TypeEnv, UNDEFINED_TYPES
+
+
+def infer_block_types(
+        first_block: int,
+        ast_map: dict[int, tuple[Node, int | tuple[int, int]]]
+) -> dict[int, TypeEnv]:
+    """
+    Returns the types that the variables can have at the start of each block reachable from first_block, considering
+    all the paths that lead to it. No variable is defined at the start of first_block.
+    """
+    block_types = {first_block: {}}
+    pending = [first_block]
+    while pending:
+        block_id = pending.pop()
+        if block_id not in ast_map:
+            continue
+        ast, next_block = ast_map[block_id]
+        out_types = ast.infer_types(block_types[block_id])
+
+        for next_id in (next_block,) if isinstance(next_block, int) else next_block:
+            in_types = block_types.get(next_id)
+            if in_types is None:
+                block_types[next_id] = out_types
+                pending.append(next_id)
+                continue
+            joined_types = _join_types(in_types, out_types)
+            # the types can only grow, so the loop stops once they do not change anymore
+            if joined_types != in_types:
+                block_types[next_id] = joined_types
+                pending.append(next_id)
+    return block_types
+
+
+def find_type_error(
+        block_types: dict[int, TypeEnv],
+        ast_map: dict[int, tuple[Node, int | tuple[int, int]]]
+) -> tuple[int, ExecutionError] | None:
+    """Returns the id of a block that always fails because of the types of the variables and its error, if any"""
+    for block_id, types in block_types.items():
+        if block_id not in ast_map:
+            continue
+        error = ast_map[block_id][0].type_error(types)
+        if error is not None:
+            return block_id, error
+    return None
+
+
+def _join_types(types_a: TypeEnv, types_b: TypeEnv) -> TypeEnv:
+    joined_types = {}
+    for name in types_a.keys() | types_b.keys():
+        joined_types[name] = types_a.get(name, UNDEFINED_TYPES) | types_b.get(name, UNDEFINED_TYPES)
+    return joined_types
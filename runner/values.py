@@ -1,8 +1,7 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from math import sin, cos, tan, asin, acos, atan, floor, ceil, log, log10
 
-from .error import ExecutionError
+from .error import ExecutionError, ExecutionException
 
 
 class ExeValueType:
@@ -13,7 +12,15 @@ class ExeValueType:
     ERROR = "<error-type>"
 
 
+# integers from SMALL_INT_MIN to SMALL_INT_MAX are always the same ExeNumber, as are true, false and the empty value
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+
+
 class ExeValue(ABC):
+    """The values are immutable, the same instance can be shared"""
+    __slots__ = ("type", "value")
+
     def __init__(self, type_, value):
         self.type = type_
         self.value = value
@@ -42,22 +49,44 @@ class ExeValue(ABC):
 
 
 class ExeEmpty(ExeValue):
-    def __init__(self):
-        super().__init__(ExeValueType.EMPTY, None)
+    __slots__ = ()
+
+    def __new__(cls):
+        return _EMPTY
+
+    # the instance is set up by __new__, object.__init__ ignores the arguments of the constructor
+    __init__ = object.__init__
+
+    def __getnewargs__(self):
+        return ()
 
     def __str__(self):
         return "ExeEmpty()"
 
 
 class ExeNumber(ExeValue):
-    def __init__(self, value: int | float):
-        super().__init__(ExeValueType.NUMBER, value)
+    __slots__ = ()
+
+    def __new__(cls, value: int | float):
+        if value.__class__ is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+            return _SMALL_INTS[value - SMALL_INT_MIN]
+        instance = object.__new__(cls)
+        instance.type = ExeValueType.NUMBER
+        instance.value = value
+        return instance
+
+    __init__ = object.__init__
+
+    def __getnewargs__(self):
+        return self.value,
 
     def __str__(self):
         return f"ExeNumber({self.value})"
 
 
 class ExeString(ExeValue):
+    __slots__ = ()
+
     def __init__(self, value: str):
         super().__init__(ExeValueType.STRING, value)
 
@@ -66,14 +95,23 @@ class ExeString(ExeValue):
 
 
 class ExeBoolean(ExeValue):
-    def __init__(self, value):
-        super().__init__(ExeValueType.BOOLEAN, bool(value))
+    __slots__ = ()
+
+    def __new__(cls, value):
+        return _TRUE if value else _FALSE
+
+    __init__ = object.__init__
+
+    def __getnewargs__(self):
+        return self.value,
 
     def __str__(self):
         return f"ExeBoolean({self.value})"
 
 
 class ExeError(ExeValue):
+    __slots__ = ()
+
     def __init__(self, name, msg, **format_args):
         super().__init__(ExeValueType.ERROR, ExecutionError(name, msg, **format_args))
 
@@ -81,6 +119,21 @@ class ExeError(ExeValue):
         return f"ExeError({self.value})"
 
 
+def _new_value(cls, type_, value):
+    """Creates a new instance of cls, whose constructor may return an existing one"""
+    instance = object.__new__(cls)
+    ExeValue.__init__(instance, type_, value)
+    return instance
+
+
+_EMPTY = _new_value(ExeEmpty, ExeValueType.EMPTY, None)
+_TRUE = _new_value(ExeBoolean, ExeValueType.BOOLEAN, True)
+_FALSE = _new_value(ExeBoolean, ExeValueType.BOOLEAN, False)
+_SMALL_INTS = tuple(
+    _new_value(ExeNumber, ExeValueType.NUMBER, i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)
+)
+
+
 def _type_error(left, right, op):
     return ExeError(
         "error.name.type_error",
@@ -354,294 +407,190 @@ def pos_val(value: ExeValue) -> ExeValue:
         )
 
 
-# ================================================ Built-in functions ================================================ #
-
-
-def _check_arg_range(arg_values, min_len, max_len):
-    if len(arg_values) < min_len:
-        return ExeError(
-            "error.name.call_error",
-            "error.msg.too_few_arguments",
-            arg_num=len(arg_values),
-            min_args=min_len
-        )
-    elif len(arg_values) > max_len > 0:
-        return ExeError(
-            "error.name.call_error",
-            "error.msg.too_many_arguments",
-            arg_num=len(arg_values),
-            max_args=max_len
-        )
-    return None
-
-
-def _check_arg_exact(arg_values, len_):
-    if len(arg_values) != len_:
-        return ExeError(
-            "error.name.call_error",
-            "error.msg.wrong_arg_num",
-            arg_num=len(arg_values),
-            args=len_
-        )
-    return None
-
-
-def _func_type_error(arg, expected_type, arg_idx, func_name):
-    return ExeError(
-        "error.name.type_error",
-        "error.msg.expected_arg_type",
-        func_name=func_name,
-        arg_idx=arg_idx,
-        type_expected=expected_type,
-        type_received=arg.type
-    )
-
-
-def mod_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 2)
-    if arg_error is not None:
-        return arg_error
-
-    number = arg_values[0]
-    divisor = arg_values[1]
-    if not number.number():
-        return _func_type_error(number, ExeValueType.NUMBER, 1, "mod")
-    if not divisor.number():
-        return _func_type_error(divisor, ExeValueType.NUMBER, 2, "mod")
-    if divisor.value == 0:
-        return ExeError("error.name.math_error", "error.msg.modulo_by_zero")
-    return ExeNumber(number.value % divisor.value)
-
-
-def sin_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
-
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "sin")
-
-    return ExeNumber(sin(arg.value))
-
-
-def cos_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
+# ==================================================== Raw values ==================================================== #
+# The compiled nodes work with the values themselves instead of ExeValues: int and float for numbers, str, bool and
+# None for empty values. Errors are raised with ExecutionException.
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "cos")
+_NUMBER_CLASSES = (int, float)
+_RAW_VALUE_TYPES = {
+    int: ExeValueType.NUMBER,
+    float: ExeValueType.NUMBER,
+    str: ExeValueType.STRING,
+    bool: ExeValueType.BOOLEAN,
+    type(None): ExeValueType.EMPTY
+}
 
-    return ExeNumber(cos(arg.value))
 
+def raw_type(value) -> str:
+    return _RAW_VALUE_TYPES[value.__class__]
 
-def tan_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "tan")
+def box_value(value) -> ExeValue:
+    """Returns the ExeValue of a raw value"""
+    value_type = _RAW_VALUE_TYPES[value.__class__]
+    if value_type == ExeValueType.NUMBER:
+        return ExeNumber(value)
+    elif value_type == ExeValueType.STRING:
+        return ExeString(value)
+    elif value_type == ExeValueType.BOOLEAN:
+        return ExeBoolean(value)
+    return ExeEmpty()
 
-    try:
-        return ExeNumber(tan(arg.value))
-    except ValueError:
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="tan", value=arg.value)
 
+def unbox_value(value: ExeValue):
+    """Returns the raw value of an ExeValue, raising ExecutionException if it is an error"""
+    if value.type == ExeValueType.ERROR:
+        raise ExecutionException(value.value)
+    return value.value
 
-def arcsin_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "arcsin")
+def raise_error(name, msg, **format_args):
+    raise ExecutionException(ExecutionError(name, msg, **format_args))
 
-    try:
-        return ExeNumber(asin(arg.value))
-    except ValueError:
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="arcsin", value=arg.value)
 
+def arithmetic_error(error: ArithmeticError) -> ExecutionError:
+    """The error of an exception raised by Python when operating on numbers, like an overflow"""
+    if isinstance(error, ZeroDivisionError):
+        return ExecutionError("error.name.math_error", "error.msg.division_by_zero")
+    return ExecutionError("error.name.math_error", "error.msg.number_too_large")
 
-def arccos_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
-
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "arccos")
-
-    try:
-        return ExeNumber(acos(arg.value))
-    except ValueError:
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="arccos", value=arg.value)
-
-
-def arctan_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
-
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "arctan")
-
-    try:
-        return ExeNumber(atan(arg.value))
-    except ValueError:
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="arctan", value=arg.value)
 
+def _raise_type_error(left, right, op):
+    raise_error(
+        "error.name.type_error",
+        "error.msg.invalid_op_types",
+        left_type=raw_type(left),
+        right_type=raw_type(right),
+        operand=op
+    )
 
-def floor_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "floor")
+def add_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES:
+        return left + right
+    elif left.__class__ is str or right.__class__ is str:
+        return str(left) + str(right)
+    _raise_type_error(left, right, "+")
 
-    return ExeNumber(floor(arg.value))
 
+def sub_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES:
+        return left - right
+    _raise_type_error(left, right, "-")
 
-def ceil_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "ceil")
+def mul_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES:
+        return left * right
+    _raise_type_error(left, right, "*")
 
-    return ExeNumber(ceil(arg.value))
 
+def div_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES:
+        if right == 0:
+            raise_error("error.name.math_error", "error.msg.division_by_zero")
+        return left / right
+    _raise_type_error(left, right, "/")
 
-def round_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_range(arg_values, 1, 2)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "round")
-    if len(arg_values) == 2 and not arg_values[1].number():
-        return _func_type_error(arg_values[1], ExeValueType.NUMBER, 2, "round")
+def mod_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES:
+        if right == 0:
+            raise_error("error.name.math_error", "error.msg.modulo_by_zero")
+        return left % right
+    _raise_type_error(left, right, "%")
 
-    if len(arg_values) == 2:
-        return ExeNumber(round(arg.value, int(arg_values[1])))
-    return ExeNumber(round(arg.value))
 
+def pow_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES:
+        try:
+            result = left ** right
+        except ArithmeticError as e:
+            # zero to a negative power or a result that does not fit in a float
+            raise ExecutionException(arithmetic_error(e))
+        if result.__class__ is complex:
+            raise_error("error.name.math_error", "error.msg.negative_root")
+        return result
+    _raise_type_error(left, right, "^")
 
-def log_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_range(arg_values, 1, 2)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "log")
-    if len(arg_values) == 2 and not arg_values[1].number():
-        return _func_type_error(arg_values[1], ExeValueType.NUMBER, 2, "log")
+def eq_raw(left, right):
+    if left is None or right is None:
+        _raise_type_error(left, right, "==")
+    if _RAW_VALUE_TYPES[left.__class__] != _RAW_VALUE_TYPES[right.__class__]:
+        return False
+    return left == right
 
-    try:
-        if len(arg_values) == 2:
-            return ExeNumber(log(arg.value, arg_values[1].value))
-        return ExeNumber(log10(arg.value))
-    except ValueError:
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="log", value=arg.value)
 
+def ne_raw(left, right):
+    return not eq_raw(left, right)
 
-def sign_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "sign")
+def gt_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES \
+       or left.__class__ is str and right.__class__ is str:
+        return left > right
+    _raise_type_error(left, right, ">")
 
-    if arg.value > 0:
-        return ExeNumber(1)
-    elif arg.value < 0:
-        return ExeNumber(-1)
-    else:
-        return ExeNumber(0)
 
+def lt_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES \
+       or left.__class__ is str and right.__class__ is str:
+        return left < right
+    _raise_type_error(left, right, "<")
 
-def sqrt_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "sqrt")
+def ge_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES \
+       or left.__class__ is str and right.__class__ is str:
+        return left >= right
+    _raise_type_error(left, right, ">=")
 
-    result = arg.value**0.5
-    if isinstance(result, complex):
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="sqrt", value=arg.value)
-    return ExeNumber(result)
 
+def le_raw(left, right):
+    if left.__class__ in _NUMBER_CLASSES and right.__class__ in _NUMBER_CLASSES \
+       or left.__class__ is str and right.__class__ is str:
+        return left <= right
+    _raise_type_error(left, right, "<=")
 
-def root_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 2)
-    if arg_error is not None:
-        return arg_error
 
-    arg = arg_values[0]
-    exp = arg_values[1]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "root")
-    if not exp.number():
-        return _func_type_error(exp, ExeValueType.NUMBER, 2, "root")
+def _raise_cast_error(value, cast_type):
+    raise_error("error.name.type_error", "error.msg.invalid_cast", op_type=raw_type(value), cast_type=cast_type)
 
-    if exp.value == 0:
-        return ExeError("error.name.math_error", "error.msg.zero_root_index")
 
-    result = arg.value ** (1 / exp.value)
-    if isinstance(result, complex):
-        return ExeError("error.name.math_error", "error.msg.undefined_func", func_name="root", value=arg.value)
-    return ExeNumber(result)
+def to_boolean_raw(value) -> bool:
+    if value is None:
+        _raise_cast_error(value, ExeValueType.BOOLEAN)
+    return bool(value)
 
 
-def max_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_range(arg_values, 2, -1)
-    if arg_error is not None:
-        return arg_error
+def to_string_raw(value) -> str:
+    if value is None:
+        _raise_cast_error(value, ExeValueType.STRING)
+    return str(value)
 
-    values = []
-    for i, arg in enumerate(arg_values):
-        if not arg.number():
-            return _func_type_error(arg, ExeValueType.NUMBER, i + 1, "max")
-        values.append(arg.value)
-    return ExeNumber(max(values))
 
+def to_number_raw(value) -> int | float:
+    if value is None:
+        _raise_cast_error(value, ExeValueType.NUMBER)
+    if value.__class__ is bool:
+        return 1 if value else 0
+    elif value.__class__ is str:
+        return unbox_value(to_number(ExeString(value)))
+    return value
 
-def min_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_range(arg_values, 2, -1)
-    if arg_error is not None:
-        return arg_error
 
-    values = []
-    for i, arg in enumerate(arg_values):
-        if not arg.number():
-            return _func_type_error(arg, ExeValueType.NUMBER, i + 1, "min")
-        values.append(arg.value)
-    return ExeNumber(min(values))
+def not_raw(value) -> bool:
+    return not to_boolean_raw(value)
 
 
-def abs_func(arg_values: list[ExeValue]) -> ExeValue:
-    arg_error = _check_arg_exact(arg_values, 1)
-    if arg_error is not None:
-        return arg_error
+def neg_raw(value):
+    if value.__class__ in _NUMBER_CLASSES:
+        return -value
+    raise_error("error.name.type_error", "error.msg.invalid_uni_op_types", operand="-", op_type=raw_type(value))
 
-    arg = arg_values[0]
-    if not arg.number():
-        return _func_type_error(arg, ExeValueType.NUMBER, 1, "abs")
 
-    return ExeNumber(abs(arg.value))
+def pos_raw(value):
+    if value.__class__ in _NUMBER_CLASSES:
+        return value
+    raise_error("error.name.type_error", "error.msg.invalid_uni_op_types", operand="+", op_type=raw_type(value))
@@ -0,0 +1,160 @@
+import time
+from contextlib import nullcontext
+from enum import Enum, auto
+
+from .error import ExecutionError, ExecutionException
+from .io_interface import Console
+from .nodes import Node, TypeEnv, counting_calls
+from .profiler import Profile
+from .values import to_boolean_raw, arithmetic_error
+
+
+class OpCode(Enum):
+    EXEC = auto()  # execute a block and jump to the argument
+    BRANCH = auto()  # execute a conditional block and jump to arg[0] if the result is true, to arg[1] otherwise
+    HALT = auto()  # the end of the flowchart was reached
+
+
+# An instruction is a tuple (op_code, block_id, function, argument)
+Instruction = tuple[OpCode, int, object, int | tuple[int, int] | None]
+
+
+def compile_program(
+        first_block: int,
+        ast_map: dict[int, tuple[Node, int | tuple[int, int]]],
+        slots: dict[str, int],
+        block_types: dict[int, TypeEnv] | None = None,
+        call_counts: dict[str, int] | None = None
+) -> list[Instruction]:
+    """
+    Compiles the blocks reachable from first_block into a flat list of instructions, the program starts at index 0.
+    Jumps use indices in the list, any block id not found in ast_map is compiled into a HALT instruction.
+    slots must contain the variables of all the blocks, see resolve_slots.
+    block_types are the types of the variables at the start of each block, see infer_block_types.
+    If call_counts is given the calls to each builtin function are counted in it.
+    """
+    if block_types is None:
+        block_types = {}
+
+    block_ids = [first_block]
+    indices = {first_block: 0}
+
+    # lay out the blocks in the order they are found, so that the next block usually follows the current one
+    for block_id in block_ids:
+        if block_id not in ast_map:
+            continue
+        next_block = ast_map[block_id][1]
+        for next_id in (next_block,) if isinstance(next_block, int) else next_block:
+            if next_id not in indices:
+                indices[next_id] = len(block_ids)
+                block_ids.append(next_id)
+
+    code = []
+    with nullcontext() if call_counts is None else counting_calls(call_counts):
+        for block_id in block_ids:
+            if block_id not in ast_map:
+                code.append((OpCode.HALT, block_id, None, None))
+                continue
+            ast, next_block = ast_map[block_id]
+            func = ast.compile(slots, block_types.get(block_id))
+            if isinstance(next_block, int):
+                code.append((OpCode.EXEC, block_id, func, indices[next_block]))
+            else:
+                code.append((OpCode.BRANCH, block_id, func, (indices[next_block[0]], indices[next_block[1]])))
+    return code
+
+
+class VirtualMachine:
+    def __init__(self, code: list[Instruction], frame: list, console: Console, profile: Profile | None = None):
+        """If profile is given, the executions of each block and the time spent in it are recorded there"""
+        self.code = code
+        self.pc = 0
+        self.frame = frame
+        self.console = console
+        self.profile = profile
+
+    @property
+    def finished(self) -> bool:
+        return self.code[self.pc][0] == OpCode.HALT
+
+    @property
+    def current_block(self) -> int:
+        """The id of the block that will be executed next, or of the one that failed"""
+        return self.code[self.pc][1]
+
+    def step(self) -> ExecutionError | None:
+        return self.run(1)
+
+    def run(self, max_steps: int = -1) -> ExecutionError | None:
+        """
+        Executes at most max_steps instructions, or until the end of the program if max_steps is negative.
+        If an error occurs it is returned and the program counter is left on the block that caused it.
+        """
+        if self.profile is not None:
+            return self.__run_profiled(max_steps)
+
+        code = self.code
+        pc = self.pc
+        frame = self.frame
+        console = self.console
+        exec_op = OpCode.EXEC
+        branch_op = OpCode.BRANCH
+
+        try:
+            while max_steps != 0:
+                op, _, func, arg = code[pc]
+                if op is exec_op:
+                    func(frame, console)
+                    pc = arg
+                elif op is branch_op:
+                    pc = arg[0] if to_boolean_raw(func(frame, console)) else arg[1]
+                else:
+                    break
+                max_steps -= 1
+        except ExecutionException as e:
+            self.pc = pc
+            return e.error
+        except ArithmeticError as e:
+            # the operations on numbers are not checked for overflows, the error stops the block that caused it
+            self.pc = pc
+            return arithmetic_error(e)
+
+        self.pc = pc
+        return None
+
+    def __run_profiled(self, max_steps: int) -> ExecutionError | None:
+        """Same as run, kept separate to leave the time measurements out of the normal execution"""
+        code = self.code
+        pc = self.pc
+        frame = self.frame
+        console = self.console
+        exec_op = OpCode.EXEC
+        branch_op = OpCode.BRANCH
+        block_counts = self.profile.block_counts
+        block_times = self.profile.block_times
+        perf_counter = time.perf_counter
+
+        try:
+            while max_steps != 0:
+                op, block_id, func, arg = code[pc]
+                if op is not exec_op and op is not branch_op:
+                    break
+                block_counts[block_id] = block_counts.get(block_id, 0) + 1
+                start = perf_counter()
+                if op is exec_op:
+                    func(frame, console)
+                    pc = arg
+                else:
+                    pc = arg[0] if to_boolean_raw(func(frame, console)) else arg[1]
+                block_times[block_id] = block_times.get(block_id, 0) + perf_counter() - start
+                max_steps -= 1
+        except ExecutionException as e:
+            self.pc = pc
+            return e.error
+        except ArithmeticError as e:
+            # the operations on numbers are not checked for overflows, the error stops the block that caused it
+            self.pc = pc
+            return arithmetic_error(e)
+
+        self.pc = pc
+        return None
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import pygame as pg
+
+from asset_manager import set_asset_path
+from runner import (
+    ExecutionError, register_builtin, cached_compilation, set_compile_cache_path, save_compile_cache,
+    clear_compile_cache
+)
+from runner import builtins, compile_cache
+from text_rendering import load_fonts
+from ui_components import CalcBlock
+
+_TEST_BUILTIN = "test_compile_cache_double"
+
+
+def setUpModule():
+    # the blocks need the fonts to measure their text
+    pg.font.init()
+    set_asset_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "_assets"))
+    load_fonts()
+
+
+class TestBuiltinsInCache(unittest.TestCase):
+    def setUp(self):
+        self.block = CalcBlock(None, f"x = {_TEST_BUILTIN}(2)")
+        set_compile_cache_path(None)
+        clear_compile_cache()
+
+    def tearDown(self):
+        builtins._builtins.pop(_TEST_BUILTIN, None)
+        set_compile_cache_path(None)
+        clear_compile_cache()
+
+    @staticmethod
+    def register():
+        register_builtin(_TEST_BUILTIN)(lambda x: x * 2)
+
+    def test_registered_builtin_is_compiled_again(self):
+        self.assertIsInstance(cached_compilation(self.block), ExecutionError)
+        self.register()
+        self.assertNotIsInstance(cached_compilation(self.block), ExecutionError)
+
+    def test_saved_cache_with_other_builtins_is_discarded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            set_compile_cache_path(os.path.join(directory, "compile_cache.pickle"))
+            self.assertIsInstance(cached_compilation(self.block), ExecutionError)
+            save_compile_cache()
+
+            # a new session where the builtin exists reads the same file
+            compile_cache._cache.clear()
+            compile_cache._cache_builtins = None
+            self.register()
+            set_compile_cache_path(os.path.join(directory, "compile_cache.pickle"))
+            self.assertNotIsInstance(cached_compilation(self.block), ExecutionError)
+
+    def test_saved_cache_with_same_builtins_is_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            set_compile_cache_path(os.path.join(directory, "compile_cache.pickle"))
+            cached_compilation(self.block)
+            save_compile_cache()
+
+            compile_cache._cache.clear()
+            compile_cache._cache_builtins = None
+            set_compile_cache_path(os.path.join(directory, "compile_cache.pickle"))
+            cached_compilation(CalcBlock(None, "y = 1"))
+            self.assertEqual(len(compile_cache._cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from runner.sym_table_snapshot import SymTableSnapshot
+
+
+class TestSymTableSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.owner = SymTableSnapshot.create(2)
+        self.addCleanup(self.owner.close)
+
+    def test_write_after_attach_is_read(self):
+        seq, values = self.owner.read()
+        self.assertEqual(values, [None, None])
+
+        attached = SymTableSnapshot.attach(self.owner.name, 2)
+        self.addCleanup(attached.close)
+        attached.write([5, "hi"])
+        self.assertEqual(self.owner.read(seq), (seq + 2, [5, "hi"]))
+
+    def test_unchanged_snapshot_is_not_read_again(self):
+        seq, _ = self.owner.read()
+        self.assertIsNone(self.owner.read(seq))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import unittest
+
+import pygame as pg
+
+from asset_manager import set_asset_path
+from runner import Runner, Console, ExecutionError, full_compilation
+from runner.nodes import CompoundNode, SetNode, ValueNode
+from text_rendering import load_fonts
+from ui_components import StartBlock, InitBlock, CalcBlock, IOBlock, EndBlock
+
+
+def setUpModule():
+    # the blocks need the fonts to measure their text
+    pg.font.init()
+    set_asset_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "_assets"))
+    load_fonts()
+
+
+class _OutputConsole(Console):
+    def __init__(self):
+        self.output = []
+
+    def stdout_write(self, string: str):
+        self.output.append(string)
+
+    def stderr_write(self, string: str):
+        self.output.append(string)
+
+    def stdin_read(self) -> str:
+        return ""
+
+    def stdin_hint(self, string: str):
+        pass
+
+
+def run_chart(init: str, calc: str, output: str) -> tuple[ExecutionError | None, list[str]]:
+    start = StartBlock()
+    init_block = InitBlock(start, init)
+    calc_block = CalcBlock(init_block, calc)
+    output_block = IOBlock(calc_block, output)
+    EndBlock(output_block)
+    console = _OutputConsole()
+    return Runner(start).run(console), console.output
+
+
+class TestArithmeticErrors(unittest.TestCase):
+    def assert_math_error(self, init: str, calc: str, msg: str):
+        error, output = run_chart(init, calc, "x")
+        self.assertIsNotNone(error)
+        self.assertEqual(error.name, "error.name.math_error")
+        self.assertEqual(error.msg, msg)
+        # the execution stops at the block that failed
+        self.assertEqual(output, [])
+
+    def test_zero_to_negative_power(self):
+        self.assert_math_error("x = 0", "x = x ^ -1", "error.msg.division_by_zero")
+
+    def test_overflow_converting_to_float(self):
+        self.assert_math_error("x = 10", "x = x ^ 400 * 1.5", "error.msg.number_too_large")
+
+    def test_overflow_of_constants(self):
+        self.assert_math_error("x = 0", "x = 10 ^ 400 * 1.5", "error.msg.number_too_large")
+
+    def test_valid_power(self):
+        error, output = run_chart("x = 2", "x = x ^ 10", "x")
+        self.assertIsNone(error)
+        self.assertEqual(output, ["1024"])
+
+
+class TestBuiltins(unittest.TestCase):
+    def assert_undefined(self, init: str, calc: str):
+        error, _ = run_chart(init, calc, "x")
+        self.assertIsNotNone(error)
+        self.assertEqual(error.name, "error.name.math_error")
+        self.assertEqual(error.msg, "error.msg.undefined_func")
+        self.assertEqual(error.fmt_args["func_name"], "pow")
+
+    def test_pow_undefined(self):
+        self.assert_undefined("x = 0", "x = pow(x, -1)")
+        self.assert_undefined("x = 2.0", "x = pow(x, 5000)")
+        self.assert_undefined("x = 0 - 8", "x = pow(x, 1 / 3)")
+
+    def test_pow_of_constants(self):
+        self.assert_undefined("x = 0", "x = pow(0, -1)")
+        self.assert_undefined("x = 0", "x = pow(2.0, 5000)")
+
+    def test_pow(self):
+        error, output = run_chart("x = 3", "x = pow(x, 4)", "x")
+        self.assertIsNone(error)
+        self.assertEqual(output, ["81"])
+
+
+class TestConstantFolding(unittest.TestCase):
+    @staticmethod
+    def folded_value(text: str):
+        ast = full_compilation(CalcBlock(None, text))
+        assert isinstance(ast, CompoundNode) and isinstance(ast.nodes[0], SetNode)
+        return ast.nodes[0].value
+
+    def test_small_powers_are_folded(self):
+        self.assertIsInstance(self.folded_value("x = 2 ^ 10"), ValueNode)
+        self.assertIsInstance(self.folded_value("x = (0 - 1) ^ 100000001"), ValueNode)
+
+    def test_large_powers_are_not_folded(self):
+        self.assertNotIsInstance(self.folded_value("x = 2 ^ 100000"), ValueNode)
+        # the base is folded first, the result is large even if the exponent is small
+        self.assertNotIsInstance(self.folded_value("x = (10 ^ 300) ^ 100000"), ValueNode)
+        self.assertNotIsInstance(self.folded_value("x = (10 ^ 1000) ^ 5"), ValueNode)
+
+    def test_errors_of_constants_are_reported_when_executed(self):
+        error, _ = run_chart("x = 0", "x = 1 / 0", "x")
+        self.assertEqual(error.msg, "error.msg.division_by_zero")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
-from .highlighter import highlight_text
+from .highlighter import highlight_text, set_builtin_functions
 from .renderer import write_mono_text, write_ui_text
 from .renderer import write_mono_text_hlt, write_ui_text_hlt
 from .renderer import get_mono_text_size, get_ui_text_size
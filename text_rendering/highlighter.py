@@ -3,13 +3,30 @@ from .constants import HC_STRS
 KEYWORDS = ("read", "as", "and", "or", "not")
 TYPE_NAMES = ("Number", "String", "Boolean")
 CONSTANTS = ("true", "false", "_pi", "_e")
-BUILTIN_FUNCTIONS = ("mod", "sin", "cos", "tan", "arcsin", "arccos", "arctan", "floor", "ceil", "round", "log", "sign",
-                     "sqrt", "root", "max", "min", "abs")
 ARITH_OPERATORS = "+-*/^=<>%"
 OTHER_SYMBOLS = "()[]{},"
 
 
+# maximum number of highlighted texts that are kept, the cache is emptied when it is full
+HIGHLIGHT_CACHE_SIZE = 1024
+
+_highlight_cache = {}
+# the names of the functions that can be called from the blocks, set from the registry of the runner
+_builtin_functions: frozenset[str] = frozenset()
+
+
+def set_builtin_functions(names):
+    """Sets the names highlighted as functions, the texts already highlighted are highlighted again"""
+    global _builtin_functions
+    _builtin_functions = frozenset(names)
+    _highlight_cache.clear()
+
+
 def highlight_text(text: str) -> str:
+    highlighted_text = _highlight_cache.get(text)
+    if highlighted_text is not None:
+        return highlighted_text
+
     highlighted_text = ""
     i = 0
 
@@ -17,6 +34,9 @@ def highlight_text(text: str) -> str:
         token, i = highlight_token(text, i)
         highlighted_text += token
 
+    if len(_highlight_cache) >= HIGHLIGHT_CACHE_SIZE:
+        _highlight_cache.clear()
+    _highlight_cache[text] = highlighted_text
     return highlighted_text
 
 
@@ -50,7 +70,7 @@ def highlight_ident(text: str, i: int) -> tuple[str, int]:
         return HC_STRS["teal"] + ident, i
     elif ident in CONSTANTS:
         return HC_STRS["magenta"] + ident, i
-    elif ident in BUILTIN_FUNCTIONS:
+    elif ident in _builtin_functions:
         return HC_STRS["purple"] + ident, i
     return HC_STRS["reset"] + ident, i
 
@@ -67,7 +67,7 @@ def _write_text(
     else:
         width = -1
 
-    surface = _text_cache.get((text, align, width, selection_range), None)
+    surface = _text_cache.get((font, text, align, width, selection_range), None)
     if surface is not None:
         return surface
 
@@ -98,12 +98,12 @@ def _write_text(
             surface.blit(text_surf, (x, lh * i))
             x += text_surf.get_width()
 
-    _text_cache[(text, align, width, selection_range)] = surface
+    _text_cache[(font, text, align, width, selection_range)] = surface
     return surface
 
 
 def _get_text_size(text: str, font: pg.font.Font):
-    size = _text_size_cache.get(text, None)
+    size = _text_size_cache.get((font, text), None)
     if size is not None:
         return size
 
@@ -113,7 +113,7 @@ def _get_text_size(text: str, font: pg.font.Font):
     height = len(raw_lines) * lh
     width = max((font.size(line)[0] for line in raw_lines))
 
-    _text_size_cache[text] = (width, height)
+    _text_size_cache[(font, text)] = (width, height)
     return width, height
 
 
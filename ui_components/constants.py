@@ -23,6 +23,7 @@ TEXTBOX_BORDER_COLOR = BLOCK_BORDER_COLOR
 TEXTBOX_SELECTEC_BORDER_COLOR = SELECTION_BORDER_COLOR
 TEXTBOX_MIN_HEIGHT = 150
 TEXTBOX_CORNER_RADIUS = 5
+TEXTBOX_ERROR_COLOR = ERROR_BORDER_COLOR
 
 PROPERTY_NAME_COL_WIDTH = int(7.5 * MONO_FONT_SIZE) - TABLE_H_PADDING * 2
 PROPERTY_VALUE_COL_WIDTH = int(10 * MONO_FONT_SIZE) - TABLE_H_PADDING * 2
@@ -10,6 +10,7 @@ from language_manager import Language
 from .table import Table
 from .constraint import *
 from .container import Container, ContainerDirection, ContainerAlignment
+from typing import Callable
 
 
 class ContentTextBoxAdaptHeight(Constraint):
@@ -25,7 +26,16 @@ class ContentTextBoxAdaptHeight(Constraint):
 
 
 class InfoBar(UIBaseComponent):
-    def __init__(self, block: BlockBase, language: Language):
+    def __init__(
+            self,
+            block: BlockBase,
+            language: Language,
+            validate_content: Callable[[str, tuple[int, int, int] | None], object] | None = None
+    ):
+        """
+        validate_content is called with the text of the block and the range of the last edit each time the text
+        changes, it returns the error in the text or None
+        """
         super().__init__(pg.Rect(0, 0, INFO_BAR_WIDTH, 0))
         self.add_constraint(AnchorWindow(AnchorPoint.TR, AnchorPoint.TR))
         self.add_constraint(MatchWindowHeight())
@@ -34,8 +44,10 @@ class InfoBar(UIBaseComponent):
 
         self.block = block
         self.language = language
+        self.validate_content = validate_content
 
         self.tb_content = None
+        self.content_error_label = None
         self.arrows_in_selector = None
         self.arrow1_out_selector = None
         self.arrow2_out_selector = None
@@ -79,12 +91,16 @@ class InfoBar(UIBaseComponent):
 
         self.__link_selectors()
 
+        if block.editable and validate_content is not None:
+            self.content_error_label = TextLabel((0, 0), "", ui_font=True)
+            components.append(self.content_error_label)
+
         if block.editable:
             self.tb_content: TextBox | None = TextBox(
                 pg.Rect(0, 0, INFO_BAR_WIDTH - PROPERTY_TEXTBOX_PADDING * 2, TEXTBOX_MIN_HEIGHT),
                 self.language.info.content_textbox.placeholder,
                 on_update=self.__update_block_text,
-                on_update_args=(self.block,)
+                on_update_args=(self,)
             )
             self.tb_content.set_text(block.content.text)
             self.tb_content.add_constraint(MatchWidth(self))
@@ -164,8 +180,17 @@ class InfoBar(UIBaseComponent):
                 selector.link_selector(link)
 
     @staticmethod
-    def __update_block_text(textbox, block):
-        block.content.text = textbox.text
+    def __update_block_text(textbox, info_bar):
+        info_bar.block.content.text = textbox.text
+        if info_bar.validate_content is None:
+            return
+        error = info_bar.validate_content(textbox.text, textbox.edit_range)
+        if error is None:
+            textbox.error_range = None
+            info_bar.content_error_label.text = ""
+        else:
+            textbox.error_range = error.span
+            info_bar.content_error_label.text = error.format(info_bar.language)
 
     def handle_event(self, event: pg.event.Event) -> bool:
         if self.container.handle_event(event):
@@ -1,6 +1,9 @@
 import pygame as pg
 from .base_component import UIBaseComponent, Pos
-from text_rendering import write_mono_text, write_mono_text_hlt, write_ui_text, write_ui_text_hlt
+from text_rendering import (
+    write_mono_text, write_mono_text_hlt, write_ui_text, write_ui_text_hlt, get_mono_text_size, get_ui_text_size,
+    highlight_text
+)
 
 
 class TextLabel(UIBaseComponent):
@@ -75,6 +78,16 @@ class TextLabel(UIBaseComponent):
         self._ui_font = bool(value)
 
     def render_text(self):
+        """Updates the size of the label, the text itself is rendered the first time it is drawn"""
+        text = highlight_text(self._text) if self._highlight else self._text
+        if self.ui_font:
+            w, h = get_ui_text_size(text)
+        else:
+            w, h = get_mono_text_size(text)
+        self.rect.size = (max(w, self._width), h)
+        self._text_surf = None
+
+    def __render_surface(self):
         if self.ui_font:
             if self._highlight:
                 self._text_surf = write_ui_text_hlt(self._text, self._align, self._width)
@@ -85,10 +98,11 @@ class TextLabel(UIBaseComponent):
                 self._text_surf = write_mono_text_hlt(self._text, self._align, self._width)
             else:
                 self._text_surf = write_mono_text(self._text, self._align, self._width)
-        self.rect.size = self._text_surf.get_size()
 
     def handle_event(self, event: pg.event.Event) -> bool:
         return False
 
     def _draw(self, screen: pg.Surface, *args, **kwargs) -> None:
+        if self._text_surf is None:
+            self.__render_surface()
         screen.blit(self._text_surf, self.rect)
@@ -4,7 +4,7 @@ from draw_utils import draw_rect
 from text_rendering import get_mono_text_size, mono_line_height, write_mono_text, write_mono_text_hlt
 from .constants import (
     TEXTBOX_BG_COLOR, TEXTBOX_PADDING, TEXTBOX_CARET_COLOR, TEXTBOX_CARET_BLINK_SPEED, TEXTBOX_BORDER_COLOR,
-    TEXTBOX_SELECTEC_BORDER_COLOR, SEPARATOR_THICKNESS, TEXTBOX_CORNER_RADIUS
+    TEXTBOX_SELECTEC_BORDER_COLOR, SEPARATOR_THICKNESS, TEXTBOX_CORNER_RADIUS, TEXTBOX_ERROR_COLOR
 )
 from text_rendering.constants import HC_STRS
 from typing import Callable
@@ -28,6 +28,11 @@ class TextBox(UIBaseComponent):
         super().__init__(rect)
 
         self._text = ""
+        # the last change to the text: the characters from start to old_end were replaced by the ones from start to
+        # new_end, as (start, old_end, new_end)
+        self.edit_range: tuple[int, int, int] | None = None
+        # the start and end of the text that is underlined as an error
+        self.error_range: tuple[int, int] | None = None
         self._caret_pos = 0
         self._focused: bool = False
         self.area_rect_offset = [0, 0]
@@ -80,7 +85,12 @@ class TextBox(UIBaseComponent):
 
     @text.setter
     def text(self, new_value):
+        self.__replace_text(0, len(self._text), new_value)
+
+    def __replace_text(self, start, end, text):
+        new_value = self._text[:start] + text + self._text[end:]
         if self._text != new_value:
+            self.edit_range = (start, end, start + len(text))
             self._text = new_value
             if self.on_update is not None:
                 self.on_update(self, *self.on_update_args)
@@ -124,6 +134,10 @@ class TextBox(UIBaseComponent):
         caret_pos[1] = line_count * mono_line_height()
         return caret_pos
 
+    def __get_char_pos(self, idx):
+        line_start = self.text.rfind("\n", 0, idx) + 1
+        return get_mono_text_size(self.text[line_start:idx])[0], self.text.count("\n", 0, idx) * mono_line_height()
+
     def __get_area_rect(self, caret_pos):
         area_rect = pg.Rect(
             self.area_rect_offset,
@@ -195,6 +209,8 @@ class TextBox(UIBaseComponent):
         draw_rect(screen, self.rect, TEXTBOX_BG_COLOR, TEXTBOX_CORNER_RADIUS, SEPARATOR_THICKNESS, border_color)
 
         screen.blit(rendered_text, (self.x + TEXTBOX_PADDING, self.y + TEXTBOX_PADDING), area_rect)
+        if self.error_range is not None and self.text:
+            self.__draw_error_range(screen, area_rect)
 
         curr_time = time.perf_counter()
         if not self.focused:
@@ -204,12 +220,45 @@ class TextBox(UIBaseComponent):
         elif curr_time - self.blink_start > TEXTBOX_CARET_BLINK_SPEED * 2:
             self.blink_start = curr_time
 
+    def caret_blink_timeout(self) -> float:
+        """The time in seconds until the caret appears or disappears"""
+        elapsed = (time.perf_counter() - self.blink_start) % (TEXTBOX_CARET_BLINK_SPEED * 2)
+        return TEXTBOX_CARET_BLINK_SPEED - elapsed % TEXTBOX_CARET_BLINK_SPEED
+
+    def __draw_error_range(self, screen: pg.Surface, area_rect: pg.Rect):
+        start = min(self.error_range[0], len(self.text))
+        end = min(max(self.error_range[1], start), len(self.text))
+        char_w = get_mono_text_size(" ")[0]
+        origin_x = self.x + TEXTBOX_PADDING - area_rect.x
+        origin_y = self.y + TEXTBOX_PADDING - area_rect.y + mono_line_height() - 1
+
+        prev_clip = screen.get_clip()
+        screen.set_clip(pg.Rect((self.x + TEXTBOX_PADDING, self.y + TEXTBOX_PADDING), area_rect.size).clip(prev_clip))
+        # the range is underlined one line at a time, an empty range marks the width of a character
+        while True:
+            line_end = self.text.find("\n", start, end)
+            if line_end == -1:
+                line_end = end
+            x, y = self.__get_char_pos(start)
+            w = get_mono_text_size(self.text[start:line_end])[0] if line_end > start else char_w
+            pg.draw.line(
+                screen,
+                TEXTBOX_ERROR_COLOR,
+                (origin_x + x, origin_y + y),
+                (origin_x + x + w - 1, origin_y + y),
+                SEPARATOR_THICKNESS
+            )
+            if line_end >= end:
+                break
+            start = line_end + 1
+        screen.set_clip(prev_clip)
+
     def insert_text(self, text: str):
         if not text:
             return
         text = text.replace('\r\n', '\n').replace('\r', '\n')
         selection_range = self.__get_selection_range()
-        self.text = self.text[:selection_range[0]] + text + self.text[selection_range[1]:]
+        self.__replace_text(selection_range[0], selection_range[1], text)
         self.caret_pos = selection_range[0] + len(text)
         self.selection_start = None
 
@@ -327,21 +376,21 @@ class TextBox(UIBaseComponent):
         elif event.key == pg.K_BACKSPACE:
             if self.selection_start is not None and self.selection_start != self.caret_pos:
                 sel_range = self.__get_selection_range()
-                self.text = self.text[:sel_range[0]] + self.text[sel_range[1]:]
+                self.__replace_text(sel_range[0], sel_range[1], "")
                 self.caret_pos = sel_range[0]
                 self.selection_start = None
             else:
-                self.text = self.text[:max(0, self.caret_pos - 1)] + self.text[self.caret_pos:]
+                self.__replace_text(max(0, self.caret_pos - 1), self.caret_pos, "")
                 self.caret_pos = max(0, self.caret_pos - 1)
                 self.selection_start = None
         elif event.key == pg.K_DELETE:
             if self.selection_start is not None and self.selection_start != self.caret_pos:
                 sel_range = self.__get_selection_range()
-                self.text = self.text[:sel_range[0]] + self.text[sel_range[1]:]
+                self.__replace_text(sel_range[0], sel_range[1], "")
                 self.caret_pos = sel_range[0]
                 self.selection_start = None
             else:
-                self.text = self.text[:self.caret_pos] + self.text[self.caret_pos + 1:]
+                self.__replace_text(self.caret_pos, min(len(self.text), self.caret_pos + 1), "")
                 self.selection_start = None
         elif event.key == pg.K_ESCAPE:
             if self.selection_start is not None: